@@ -8,6 +8,12 @@ import shutil
 import os
 import requests
 import json
+import asyncio
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+import websockets
 OUTPUT_DIR = "/tmp/audio_kiosk"  # ✅ 반드시 존재해야 함
 
 app = FastAPI()
@@ -24,9 +30,106 @@ UPLOAD_DIR = "/tmp/audio_kiosk"
 TTS_SERVER_URL = "http://localhost:9200"
 STT_SERVER_URL = "http://localhost:9005"
 LLM_SERVER_URL = "http://localhost:9110"
+STT_STREAM_URL = STT_SERVER_URL.replace("http", "ws", 1) + "/stt/stream"
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# 압축 전송 형식 (TTS 서버의 /audio?format= 과 같음)
+AUDIO_MEDIA_TYPES = {"wav": "audio/wav", "opus": "audio/ogg", "mp3": "audio/mpeg"}
+ACCEPT_TYPES = {
+    "audio/wav": "wav", "audio/x-wav": "wav", "audio/wave": "wav",
+    "audio/ogg": "opus", "audio/opus": "opus",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+}
+
+def negotiate_format(requested, accept, default="wav"):
+    """TTS 서버의 encode.negotiate 와 같은 순서: format 파라미터 우선, 없으면 Accept 에서 q 값이 가장 높은 형식.
+    지원하지 않는 format 을 명시하면 None."""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in AUDIO_MEDIA_TYPES else None
+    best, best_q = default, 0.0
+    for item in (accept or "").split(","):
+        media, _, params = item.strip().partition(";")
+        fmt = ACCEPT_TYPES.get(media.strip().lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+# TTS 음성은 디스크에 두 번째 복사본을 쓰지 않고 메모리에 잠시 보관 (유효시간 + 전체 크기 제한)
+TTS_AUDIO_TTL_S = float(os.getenv("KIOSK_TTS_AUDIO_TTL_S", "600"))
+TTS_AUDIO_MAX_MB = float(os.getenv("KIOSK_TTS_AUDIO_MAX_MB", "64"))
+tts_audio = OrderedDict()  # filename → (저장 시각, wav 바이트)
+tts_audio_bytes = 0
+tts_audio_lock = threading.Lock()
+
+def evict_tts_audio():
+    global tts_audio_bytes
+    now = time.monotonic()
+    while tts_audio:
+        stored_at, data = next(iter(tts_audio.values()))
+        if now - stored_at <= TTS_AUDIO_TTL_S and tts_audio_bytes <= TTS_AUDIO_MAX_MB * 1024 * 1024:
+            break
+        tts_audio.popitem(last=False)
+        tts_audio_bytes -= len(data)
+
+def put_tts_audio(filename: str, data: bytes):
+    global tts_audio_bytes
+    with tts_audio_lock:
+        tts_audio[filename] = (time.monotonic(), data)
+        tts_audio_bytes += len(data)
+        evict_tts_audio()
+
+def get_tts_audio_bytes(filename: str):
+    with tts_audio_lock:
+        evict_tts_audio()
+        entry = tts_audio.get(filename)
+        return entry[1] if entry else None
+
+# 업로드 폴더 정리: STT 처리 전에 연결이 끊겨 남은 업로드 파일을 유효시간 / 전체 크기 안으로 삭제
+UPLOAD_TTL_S = float(os.getenv("KIOSK_UPLOAD_TTL_S", "3600"))
+UPLOAD_MAX_MB = float(os.getenv("KIOSK_UPLOAD_MAX_MB", "256"))
+
+def sweep_upload_dir():
+    files = []
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_file():
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, entry.path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    now = time.time()
+    for mtime, size, path in files:
+        if now - mtime <= UPLOAD_TTL_S and total <= UPLOAD_MAX_MB * 1024 * 1024:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+async def upload_janitor():
+    while True:
+        try:
+            await run_in_threadpool(sweep_upload_dir)
+        except Exception as e:
+            print(f"업로드 폴더 정리 오류: {e}")
+        await asyncio.sleep(60)
+
+@app.on_event("startup")
+async def start_upload_janitor():
+    asyncio.create_task(upload_janitor())
+
 @app.get("/health")
 def health_check():
     results = {}
@@ -64,11 +167,12 @@ def run_stt(audio_path: str):
         raise
 
 # LLM 호출
-def run_bllossom_llm(user_text: str, message_type: str = "general"):
+def run_bllossom_llm(user_text: str, message_type: str = "general", session_id: str = "default"):
     try:
         payload = {
             "text": user_text,
-            "type": message_type
+            "type": message_type,
+            "session_id": session_id
         }
         response = requests.post(f"{LLM_SERVER_URL}/llm", json=payload, timeout=30)
         if response.status_code == 200:
@@ -89,16 +193,13 @@ def run_tts(text: str) -> str:
         )
 
         if response.status_code == 200:
-            # audio/wav 응답을 바이너리로 받아 저장
-            uid = str(uuid.uuid4())
-            output_dir = "/tmp/audio_kiosk"  # main.py에서 쓰는 경로
-            os.makedirs(output_dir, exist_ok=True)
-
-            output_path = os.path.join(output_dir, f"{uid}.wav")
-            with open(output_path, "wb") as f:
-                f.write(response.content)
+            # audio/wav 응답을 파일로 저장하지 않고 메모리에 보관
+            # (TTS 서버가 붙인 파일 이름을 그대로 써서 /ttsaudio 에서 같은 발화의 압축본을 요청할 수 있게 함)
+            disposition = response.headers.get("content-disposition", "")
+            filename = disposition.split('filename="')[-1].rstrip('"') if 'filename="' in disposition else f"{uuid.uuid4()}.wav"
+            put_tts_audio(filename, response.content)
 
-            return f"{uid}.wav"  # 프론트에 /ttsaudio/{filename} 형태로 반환 가능
+            return filename  # 프론트에 /ttsaudio/{filename} 형태로 반환 가능
 
         else:
             raise RuntimeError(f"TTS 서버 오류: {response.status_code}")
@@ -145,8 +246,33 @@ async def speak_text(request: Request):
 
 
 @app.get("/ttsaudio/{filename}")
-@app.get("/ttsaudio/{filename}")
-async def get_audio(filename: str):
+async def get_audio(filename: str, request: Request, format: Optional[str] = None):
+    # 압축 형식(?format=opus|mp3 또는 Accept 헤더)은 TTS 서버가 인코딩하고, 받아 온 압축본은 WAV 옆에 보관
+    stem = filename.rsplit(".", 1)[0]
+    accept = request.headers.get("accept", "*/*")
+    fmt = negotiate_format(format, accept)
+    if fmt is None:
+        return JSONResponse({"status": "error", "detail": f"unsupported format: {format}"}, status_code=400)
+    if fmt != "wav":
+        # Accept 로 고른 형식도 같은 이름으로 찾으므로 브라우저 재요청은 TTS 서버까지 가지 않음
+        audio = get_tts_audio_bytes(f"{stem}.{fmt}")
+        if audio is not None:
+            return Response(content=audio, media_type=AUDIO_MEDIA_TYPES[fmt])
+        try:
+            upstream = await run_in_threadpool(
+                requests.get, f"{TTS_SERVER_URL}/audio/{stem}.wav", params={"format": fmt}, timeout=10)
+            if upstream.status_code == 200:
+                served = upstream.headers.get("x-tts-format", "wav")
+                if served != "wav":
+                    put_tts_audio(f"{stem}.{served}", upstream.content)
+                return Response(content=upstream.content, media_type=upstream.headers.get("content-type", "audio/wav"))
+        except Exception as e:
+            print(f"TTS 압축 음성 가져오기 오류: {e}")
+
+    audio = get_tts_audio_bytes(filename)
+    if audio is not None:
+        return Response(content=audio, media_type="audio/wav")
+
     path = os.path.join(OUTPUT_DIR, filename)
     print(f"[DEBUG] 요청된 파일 경로: {path}")
     try:
@@ -184,6 +310,8 @@ def get_tts_audio(filename: str):
 @app.websocket("/ws/kiosk")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    # 키오스크(웹소켓 연결)마다 LLM 대화 세션을 따로 유지
+    session_id = websocket.query_params.get("session_id") or str(uuid.uuid4())
     
     try:
         while True:
@@ -219,7 +347,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 try:
                     # LLM 처리
                     await websocket.send_json({"stage": "status", "text": "응답 생성 중..."})
-                    llm_response = await run_in_threadpool(run_bllossom_llm, user_text, message_type)
+                    llm_response = await run_in_threadpool(run_bllossom_llm, user_text, message_type, session_id)
                     await websocket.send_json({"stage": "llm", "text": llm_response})
                     
                 except Exception as e:
@@ -230,6 +358,41 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"WebSocket error: {e}")
         await websocket.close()
 
+# 스트리밍 STT 중계: 브라우저의 16kHz PCM16 프레임을 STT 서버로 그대로 전달하고
+# 부분/최종 인식 결과({"type": "partial" | "final", ...})를 돌려줍니다.
+@app.websocket("/ws/stt")
+async def stt_stream_relay(websocket: WebSocket):
+    await websocket.accept()
+
+    try:
+        async with websockets.connect(STT_STREAM_URL, max_size=None) as upstream:
+            async def client_to_upstream():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        break
+                    if message.get("bytes") is not None:
+                        await upstream.send(message["bytes"])
+                    elif message.get("text") is not None:
+                        await upstream.send(message["text"])
+
+            async def upstream_to_client():
+                async for message in upstream:
+                    await websocket.send_text(message)
+
+            tasks = [asyncio.create_task(client_to_upstream()), asyncio.create_task(upstream_to_client())]
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+
+    except Exception as e:
+        print(f"STT 스트리밍 중계 오류: {e}")
+        try:
+            await websocket.send_json({"type": "error", "text": "STT streaming failed"})
+            await websocket.close()
+        except Exception:
+            pass
+
 # 정적 파일 서빙 (프론트엔드)
 FRONTEND_BUILD_DIR = os.path.abspath("../frontend/hospital-kiosk/out")
 
@@ -5,6 +5,8 @@ export async function GET(request: NextRequest) {
     const searchParams = request.nextUrl.searchParams
     const path = searchParams.get("path")
     const url = searchParams.get("url")
+    // 전송 형식 (opus | mp3 | wav). 없으면 브라우저 Accept 헤더로 백엔드/TTS 서버가 고름
+    const format = searchParams.get("format")
 
     if (!path && !url) {
       return new Response("Missing path or url parameter", { status: 400 })
@@ -17,7 +19,10 @@ export async function GET(request: NextRequest) {
       audioResponse = await fetch(url)
     } else {
       // path 파라미터가 있으면 백엔드에서 오디오 가져오기
-      audioResponse = await fetch(`http://localhost:8000/ttsaudio/${path}`)
+      const query = format ? `?format=${encodeURIComponent(format)}` : ""
+      audioResponse = await fetch(`http://localhost:8000/ttsaudio/${path}${query}`, {
+        headers: { Accept: request.headers.get("accept") ?? "*/*" },
+      })
     }
 
     if (!audioResponse.ok) {
@@ -28,7 +33,7 @@ export async function GET(request: NextRequest) {
 
     return new Response(audioBuffer, {
       headers: {
-        "Content-Type": "audio/wav",
+        "Content-Type": audioResponse.headers.get("content-type") ?? "audio/wav",
         "Cache-Control": "no-cache, no-store, must-revalidate",
       },
     })
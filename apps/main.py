@@ -9,6 +9,7 @@ import shutil
 import os
 import requests
 import asyncio
+from typing import Optional
 
 app = FastAPI()
 
@@ -79,8 +80,8 @@ def run_stt(audio_path: str):
         response = requests.post("http://localhost:9005/stt", files={"file": f})
     return response.json()["text"]
 
-def run_bllossom_llm(user_text: str):
-    response = requests.post("http://localhost:9101/llm", json={"text": user_text})
+def run_bllossom_llm(user_text: str, session_id: str = "default"):
+    response = requests.post("http://localhost:9101/llm", json={"text": user_text, "session_id": session_id})
     return response.json()["text"]
 
 def run_tts(text: str) -> str:
@@ -104,9 +105,14 @@ async def upload_audio(file: UploadFile = File(...)):
 # 생성된 TTS 음성 반환
 # =======================
 @app.get("/ttsaudio/{filename}")
-def run_tts_audio(filename: str):
-    response = requests.get(f"{TTS_SERVER_URL}/audio/{filename}")
-    return Response(content=response.content, media_type="audio/wav")
+def run_tts_audio(filename: str, request: Request, format: Optional[str] = None):
+    # 압축 형식(?format=opus|mp3 또는 Accept 헤더)은 TTS 서버가 인코딩하고 캐시
+    response = requests.get(
+        f"{TTS_SERVER_URL}/audio/{filename}",
+        params={"format": format} if format else None,
+        headers={"Accept": request.headers.get("accept", "*/*")},
+    )
+    return Response(content=response.content, media_type=response.headers.get("content-type", "audio/wav"))
 
 # =======================
 # WebSocket 상호작용
@@ -114,6 +120,8 @@ def run_tts_audio(filename: str):
 @app.websocket("/ws/kiosk")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    # 키오스크(웹소켓 연결)마다 LLM 대화 세션을 따로 유지
+    session_id = websocket.query_params.get("session_id") or str(uuid.uuid4())
 
     # 초기화 메시지
     for stage in ["status", "stt", "llm", "tts"]:
@@ -130,7 +138,7 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.send_json({"stage": "stt", "text": stt_text})
 
             await websocket.send_json({"stage": "status", "text": "응답 생성 중..."})
-            llm_response = await run_in_threadpool(run_bllossom_llm, stt_text)
+            llm_response = await run_in_threadpool(run_bllossom_llm, stt_text, session_id)
             await websocket.send_json({"stage": "llm", "text": llm_response})
 
             await websocket.send_json({"stage": "status", "text": "음성 생성 중..."})
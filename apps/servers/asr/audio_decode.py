@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import multiprocessing
+import struct
+import subprocess
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from math import gcd
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TARGET_SR = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def parse_wav_header(data: bytes):
+    """RIFF/WAVE 헤더를 읽어 포맷 정보와 PCM 데이터 위치를 돌려줍니다. WAV 가 아니면 None."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # SubFormat GUID 의 앞 2바이트가 실제 포맷 태그
+                format_tag = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = {"format": format_tag, "channels": channels, "sample_rate": sample_rate, "bits": bits}
+
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            # 스트리밍 녹음은 data 크기가 0 이나 0xFFFFFFFF 로 기록되기도 함
+            available = len(data) - body
+            size = chunk_size if 0 < chunk_size <= available else available
+            return dict(fmt, offset=body, size=size)
+
+        pos = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def decode_fast(data: bytes):
+    """이미 16kHz 모노 PCM16/float32 인 WAV 는 서브프로세스 없이 바로 디코딩합니다.
+
+    조건에 맞지 않으면 None 을 돌려주고, 호출 측은 일반 경로로 넘깁니다.
+    """
+    info = parse_wav_header(data)
+    if info is None or info["channels"] != 1 or info["sample_rate"] != TARGET_SR:
+        return None
+
+    if info["format"] == WAVE_FORMAT_PCM and info["bits"] == 16:
+        count = info["size"] // 2
+        pcm = np.frombuffer(data, dtype="<i2", count=count, offset=info["offset"])
+        return pcm.astype(np.float32) / 32768.0
+
+    if info["format"] == WAVE_FORMAT_IEEE_FLOAT and info["bits"] == 32:
+        count = info["size"] // 4
+        return np.frombuffer(data, dtype="<f4", count=count, offset=info["offset"]).copy()
+
+    return None
+
+
+def ffmpeg_decode(data: bytes) -> np.ndarray:
+    # WAV 컨테이너를 거치지 않고 float32 raw PCM 으로 바로 받아 복사를 한 번 줄입니다.
+    p = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error",
+         "-i", "pipe:0",
+         "-ar", str(TARGET_SR),
+         "-ac", "1",
+         "-f", "f32le",
+         "pipe:1"],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if p.returncode != 0:
+        raise RuntimeError(f"ffmpeg 디코딩 실패: {p.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(p.stdout, dtype="<f4").copy()
+
+
+def to_mono_16k(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sample_rate != TARGET_SR:
+        from scipy.signal import resample_poly
+        g = gcd(TARGET_SR, sample_rate)
+        audio = resample_poly(audio, TARGET_SR // g, sample_rate // g)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def worker_decode(data: bytes) -> np.ndarray:
+    """디코더 워커 프로세스에서 실행됩니다.
+
+    libsndfile 이 읽을 수 있는 포맷(WAV/FLAC/OGG 등)은 프로세스 안에서 디코딩하고,
+    브라우저 webm/mp4 처럼 읽지 못하는 컨테이너만 ffmpeg 로 넘깁니다.
+    """
+    try:
+        import soundfile as sf
+        audio, sample_rate = sf.read(BytesIO(data), dtype="float32", always_2d=True)
+        return to_mono_16k(audio, sample_rate)
+    except Exception:
+        return ffmpeg_decode(data)
+
+
+def _noop():
+    return None
+
+
+class AudioDecoder:
+    """16kHz 모노 WAV 는 즉시 디코딩하고, 나머지는 상주 디코더 워커 풀로 보냅니다.
+
+    워커가 죽어(OOM, 디코더 segfault 등) 풀이 깨지면 새 풀을 만들고 한 번 다시 시도합니다.
+    이때는 모델이 이미 올라가 있으므로 fork 대신 forkserver 로 띄웁니다.
+    """
+
+    def __init__(self, num_workers=2):
+        self.num_workers = max(1, int(num_workers))
+        # 모델을 올리기 전에 fork 해 두어야 워커가 GPU 메모리를 물려받지 않습니다.
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def warmup(self):
+        # 워커 프로세스를 미리 띄워 첫 요청이 프로세스 생성 비용을 치르지 않게 합니다.
+        for f in [self.pool.submit(_noop) for _ in range(self.num_workers)]:
+            f.result()
+
+    async def decode(self, data: bytes) -> np.ndarray:
+        audio = decode_fast(data)
+        if audio is not None:
+            self.counts["fast"] += 1
+            return audio
+
+        self.counts["pool"] += 1
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, worker_decode, data)
+        except BrokenProcessPool:
+            logger.error("[x] 디코더 워커 풀이 깨져 다시 만듭니다.")
+            self._rebuild(pool)
+            return await loop.run_in_executor(self.pool, worker_decode, data)
+
+    def _rebuild(self, broken):
+        with self._lock:
+            # 동시에 실패한 요청들이 풀을 여러 번 만들지 않도록 깨진 풀일 때만 교체
+            if self.pool is not broken:
+                return
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+            self.counts["rebuilds"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {"workers": self.num_workers, "fast": self.counts["fast"], "pool": self.counts["pool"],
+                "rebuilds": self.counts["rebuilds"]}
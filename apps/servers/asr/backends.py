@@ -0,0 +1,68 @@
+import logging
+import os
+
+import torch
+from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+logger = logging.getLogger(__name__)
+
+# torch : 기본 PyTorch (GPU 가 있으면 GPU, 없으면 fp32 CPU)
+# int8  : CPU 동적 int8 양자화 (nn.Linear 가중치)
+# onnx  : ONNX Runtime 으로 export 한 그래프 (optimum[onnxruntime] 필요)
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def weight_kwargs(model_dir):
+    # safetensors 가중치가 있으면 그것만 읽음 (mmap 으로 바로 매핑, pytorch_model.bin 의 torch.load 역직렬화 생략)
+    if os.path.isdir(model_dir) and any(f.endswith(".safetensors") for f in os.listdir(model_dir)):
+        return {"use_safetensors": True}
+    logger.warning(f"safetensors 가중치 없음: {model_dir} (pytorch_model.bin 로딩)")
+    return {}
+
+
+def load_torch(model_dir):
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return WhisperForConditionalGeneration.from_pretrained(model_dir, **weight_kwargs(model_dir)).to(device)
+
+
+def load_int8(model_dir):
+    model = WhisperForConditionalGeneration.from_pretrained(model_dir, **weight_kwargs(model_dir)).to("cpu")
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_onnx(model_dir, onnx_dir=None):
+    try:
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    except ImportError as e:
+        raise RuntimeError("onnx 백엔드는 optimum[onnxruntime] 설치가 필요합니다.") from e
+
+    onnx_dir = onnx_dir or model_dir.rstrip("/") + "-onnx"
+    if os.path.isdir(onnx_dir) and any(f.endswith(".onnx") for f in os.listdir(onnx_dir)):
+        return ORTModelForSpeechSeq2Seq.from_pretrained(onnx_dir)
+
+    # 처음 한 번만 export 하고 이후에는 저장된 그래프를 재사용
+    logger.info(f"ONNX export 시작: {model_dir} → {onnx_dir}")
+    model = ORTModelForSpeechSeq2Seq.from_pretrained(model_dir, export=True)
+    model.save_pretrained(onnx_dir)
+    return model
+
+
+def load_backend(name, model_dir, onnx_dir=None, cpu_threads=None):
+    """(processor, model) 을 돌려줍니다. 어느 백엔드든 model.generate / model.device 로 같은 방식으로 호출합니다."""
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 STT 백엔드: {name} (가능: {', '.join(BACKENDS)})")
+
+    if cpu_threads:
+        torch.set_num_threads(int(cpu_threads))
+
+    processor = WhisperProcessor.from_pretrained(model_dir)
+    if name == "int8":
+        model = load_int8(model_dir)
+    elif name == "onnx":
+        model = load_onnx(model_dir, onnx_dir)
+    else:
+        model = load_torch(model_dir)
+
+    logger.info(f"STT 백엔드: {name} (device={model.device})")
+    return processor, model
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """동시에 들어온 요청을 짧은 시간 동안 모아 한 번의 배치 호출로 처리합니다.
+
+    process_batch 는 입력 리스트를 받아 같은 순서의 결과 리스트를 돌려주는 동기 함수이며,
+    이벤트 루프를 막지 않도록 스레드풀에서 실행됩니다.
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=10.0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = None
+        self._worker = None
+        self._getter = None  # 시간 초과로 버리지 않고 다음 수집까지 이어서 기다리는 queue.get()
+
+        # 배치 크기 통계
+        self.batch_sizes = Counter()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.max_seen_batch = 0
+
+    def start(self):
+        # 실행 중인 이벤트 루프 안에서 처음 호출될 때 워커를 띄웁니다.
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._getter = None
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._getter is not None:
+            self._getter.cancel()
+            self._getter = None
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _get(self, timeout=None):
+        """큐에서 하나 꺼냅니다. 시간 초과면 None.
+
+        wait_for(queue.get(), timeout) 은 get 이 끝나는 순간 시간 초과가 겹치면 꺼낸 항목을 버릴 수 있어
+        (Python 3.10), get 작업을 취소하지 않고 남겨 두었다가 다음 호출에서 이어서 기다립니다.
+        """
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        getter, self._getter = self._getter, None
+        return getter.result()
+
+    async def _collect(self):
+        first = await self._get()
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 이미 대기 중인 요청은 기다리지 않고 바로 합칩니다.
+            if self._getter is not None and self._getter.done():
+                batch.append(await self._get())
+                continue
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            job = await self._get(timeout)
+            if job is None:
+                break
+            batch.append(job)
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # 연결이 끊겨 취소된 요청은 제외
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            self._record(len(batch))
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.process_batch, items)
+            except Exception as e:
+                logger.exception("[x] 배치 처리 실패 (batch_size=%d)", len(batch))
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def _record(self, size):
+        self.batch_sizes[size] += 1
+        self.total_requests += size
+        self.total_batches += 1
+        self.max_seen_batch = max(self.max_seen_batch, size)
+
+    def stats(self):
+        avg = self.total_requests / self.total_batches if self.total_batches else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth,
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "avg_batch_size": round(avg, 3),
+            "max_seen_batch": self.max_seen_batch,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+        }
@@ -0,0 +1,99 @@
+"""STT 백엔드 벤치마크 (torch / int8 / onnx)
+
+로컬 샘플 디렉토리(오디오 + 같은 이름의 .txt 정답, .txt 는 선택)로 백엔드별
+RTF(real-time factor = 처리 시간 / 오디오 길이)와 PyTorch 기준 대비 WER 변화를 측정합니다.
+
+사용법:
+    python bench_backend.py --samples ./samples --backends torch,int8,onnx [--threads 4]
+"""
+import argparse
+import glob
+import os
+import time
+
+import torch
+
+from audio_decode import worker_decode
+from backends import load_backend
+from bench_longform import DEFAULT_MODEL_DIR, edit_distance
+
+AUDIO_EXTS = (".wav", ".flac", ".ogg", ".mp3", ".webm", ".m4a")
+
+
+def wer(ref, hyp):
+    ref_words = ref.split()
+    return edit_distance(ref_words, hyp.split()) / max(1, len(ref_words))
+
+
+def load_samples(sample_dir):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(sample_dir, "*"))):
+        stem, ext = os.path.splitext(path)
+        if ext.lower() not in AUDIO_EXTS:
+            continue
+        with open(path, "rb") as f:
+            audio = worker_decode(f.read())
+        ref = None
+        if os.path.exists(stem + ".txt"):
+            with open(stem + ".txt", encoding="utf-8") as f:
+                ref = f.read().strip()
+        samples.append((os.path.basename(path), audio, ref))
+    return samples
+
+
+def transcribe_all(processor, model, samples):
+    texts = []
+    start = time.perf_counter()
+    for _, audio, _ in samples:
+        features = processor(audio, sampling_rate=16000, return_tensors="pt").input_features.to(model.device)
+        with torch.inference_mode():
+            ids = model.generate(features)
+        texts.append(processor.batch_decode(ids, skip_special_tokens=True)[0])
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", required=True)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--onnx-dir", default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        raise SystemExit(f"{args.samples} 에 오디오 파일이 없습니다.")
+    audio_s = sum(len(a) for _, a, _ in samples) / 16000
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "torch" in backends:
+        # WER 변화는 PyTorch 결과를 기준으로 계산
+        backends.remove("torch")
+    backends.insert(0, "torch")
+
+    baseline = None
+    print(f"samples={len(samples)} audio={audio_s:.1f}s")
+    print(f"{'backend':<8} {'device':<8} {'RTF':>7} {'WER vs torch':>13} {'WER vs ref':>11}")
+    for name in backends:
+        try:
+            processor, model = load_backend(name, args.model_dir, onnx_dir=args.onnx_dir, cpu_threads=args.threads)
+        except Exception as e:
+            print(f"{name:<8} 로딩 실패: {e}")
+            continue
+
+        transcribe_all(processor, model, samples[:1])  # 워밍업
+        texts, elapsed = transcribe_all(processor, model, samples)
+        if baseline is None:
+            baseline = texts
+
+        drift = sum(wer(b, t) for b, t in zip(baseline, texts)) / len(texts)
+        refs = [(ref, t) for (_, _, ref), t in zip(samples, texts) if ref]
+        ref_wer = f"{sum(wer(r, t) for r, t in refs) / len(refs):11.3f}" if refs else f"{'-':>11}"
+        print(f"{name:<8} {str(model.device):<8} {elapsed / audio_s:7.3f} {drift:13.3f} {ref_wer}")
+
+        del model
+
+
+if __name__ == "__main__":
+    main()
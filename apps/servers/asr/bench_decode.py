@@ -0,0 +1,108 @@
+"""오디오 디코딩 경로 벤치마크
+
+기존 방식(요청마다 ffmpeg 프로세스 → WAV → torchaudio.load(BytesIO))과
+16k 모노 WAV 빠른 경로, 상주 디코더 워커 풀 경로의 요청당 지연을 비교합니다.
+
+사용법:
+    python bench_decode.py                 # 합성 신호로 측정
+    python bench_decode.py a.wav b.webm    # 실제 녹음 파일로 측정
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import subprocess
+import time
+import wave
+
+import numpy as np
+
+from audio_decode import AudioDecoder, decode_fast, worker_decode
+
+
+def legacy_decode(data: bytes) -> np.ndarray:
+    # 변경 전 whisper_server.convert_to_wav + torchaudio.load 경로
+    import torchaudio
+
+    p = subprocess.Popen(
+        ["ffmpeg", "-y", "-i", "pipe:0", "-ar", "16000", "-ac", "1", "-f", "wav", "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    out, _ = p.communicate(data)
+    waveform, _ = torchaudio.load(io.BytesIO(out))
+    return waveform.squeeze(0).numpy()
+
+
+def make_wav(seconds: float, sample_rate: int, channels: int) -> bytes:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t)
+    pcm = (np.repeat(tone[:, None], channels, axis=1) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def timeit(fn, data, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, label, samples):
+    if not samples:
+        print(f"{name:<28} {label:<8} skipped")
+        return
+    p50 = statistics.median(samples)
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} {label:<8} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.files:
+        inputs = [(os.path.basename(f), open(f, "rb").read()) for f in args.files]
+    else:
+        inputs = [
+            ("synthetic 16k mono 3s", make_wav(3.0, 16000, 1)),
+            ("synthetic 44.1k stereo 3s", make_wav(3.0, 44100, 2)),
+        ]
+
+    decoder = AudioDecoder(num_workers=args.workers)
+    decoder.warmup()
+    loop = asyncio.new_event_loop()
+
+    try:
+        for name, data in inputs:
+            try:
+                report(name, "legacy", timeit(legacy_decode, data, args.repeat))
+            except Exception as e:
+                print(f"{name:<28} legacy   failed: {e}")
+
+            if decode_fast(data) is not None:
+                report(name, "fast", timeit(decode_fast, data, args.repeat))
+            else:
+                report(name, "fast", [])
+
+            # 빠른 경로를 건너뛰고 워커 풀 경로만 측정
+            pooled = lambda d: loop.run_until_complete(loop.run_in_executor(decoder.pool, worker_decode, d))
+            report(name, "pool", timeit(pooled, data, args.repeat))
+    finally:
+        loop.close()
+        decoder.shutdown()
+
+
+if __name__ == "__main__":
+    main()
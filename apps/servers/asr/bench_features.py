@@ -0,0 +1,74 @@
+"""log-mel 특징 추출 검증 / 벤치마크
+
+WhisperProcessor(CPU NumPy 경로 + 디바이스 복사)와 LogMelExtractor(디바이스 배치 연산)의
+출력이 수치적으로 일치하는지 확인하고, 배치 크기별 처리 시간을 비교합니다.
+
+사용법:
+    python bench_features.py [--model-dir MODEL_DIR] [--device cuda] [--batch-sizes 1,4,8]
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+from transformers import WhisperProcessor
+
+from bench_longform import DEFAULT_MODEL_DIR
+from features import LogMelExtractor
+
+
+def sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def timed(fn, device, repeat):
+    fn()
+    sync(device)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    sync(device)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    processor = WhisperProcessor.from_pretrained(args.model_dir)
+    fe = processor.feature_extractor
+    extractor = LogMelExtractor(fe, device=device)
+
+    rng = np.random.default_rng(0)
+    n = int(args.seconds * 16000)
+
+    # 1) 수치 일치 확인: NumPy 기준 구현과 비교
+    waveforms = [(rng.standard_normal(n) * 0.1).astype(np.float32) for _ in range(4)]
+    padded = np.zeros((len(waveforms), fe.n_samples), dtype=np.float32)
+    for i, w in enumerate(waveforms):
+        padded[i, :len(w)] = w
+    reference = torch.from_numpy(fe._np_extract_fbank_features(padded, "cpu"))
+    via_processor = processor(waveforms, sampling_rate=16000, return_tensors="pt").input_features
+    ours = extractor(waveforms).cpu()
+    print(f"max |diff| vs numpy reference : {(ours - reference).abs().max().item():.2e}")
+    print(f"max |diff| vs WhisperProcessor: {(ours - via_processor).abs().max().item():.2e}")
+
+    # 2) 배치 크기별 시간 (디바이스 복사 포함)
+    print(f"{'batch':>5} {'processor ms':>13} {'extractor ms':>13}")
+    for bs in [int(b) for b in args.batch_sizes.split(",")]:
+        batch = [(rng.standard_normal(n) * 0.1).astype(np.float32) for _ in range(bs)]
+        base = timed(lambda: processor(batch, sampling_rate=16000, return_tensors="pt").input_features.to(device),
+                     device, args.repeat)
+        fast = timed(lambda: extractor(batch), device, args.repeat)
+        print(f"{bs:>5} {base:13.2f} {fast:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
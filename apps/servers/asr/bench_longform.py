@@ -0,0 +1,105 @@
+"""무음 제거 / 롱폼 분할 벤치마크
+
+샘플 디렉토리의 한국어 녹음(*.wav 등)과 같은 이름의 정답 전사(*.txt)로
+세 가지 전처리 모드의 처리 시간과 CER(문자 오류율)을 비교합니다.
+
+  baseline : 기존 방식 (전체 녹음을 그대로 넣고 30초 이후는 잘림)
+  trim     : 앞뒤 무음 제거
+  longform : 무음 제거 + 30초 초과 녹음을 겹침 창으로 나눠 한 배치로 처리
+
+사용법:
+    python bench_longform.py --samples ./samples [--model-dir MODEL_DIR]
+"""
+import argparse
+import glob
+import os
+import time
+
+import torch
+from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+from audio_decode import worker_decode
+from longform import merge_transcripts, split_long_form
+from vad import trim_silence
+
+DEFAULT_MODEL_DIR = "/data/bootcamp/final_project/asr_finetune/outputs/whisper-finetuned-ko-star-v1"
+
+
+def edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def cer(ref, hyp):
+    ref = ref.replace(" ", "")
+    hyp = hyp.replace(" ", "")
+    return edit_distance(ref, hyp) / max(1, len(ref))
+
+
+def load_samples(sample_dir):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(sample_dir, "*"))):
+        stem, ext = os.path.splitext(path)
+        if ext == ".txt" or not os.path.exists(stem + ".txt"):
+            continue
+        with open(path, "rb") as f:
+            audio = worker_decode(f.read())
+        with open(stem + ".txt", encoding="utf-8") as f:
+            ref = f.read().strip()
+        samples.append((os.path.basename(path), audio, ref))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", required=True)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    args = parser.parse_args()
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    processor = WhisperProcessor.from_pretrained(args.model_dir)
+    model = WhisperForConditionalGeneration.from_pretrained(args.model_dir).to(device)
+
+    def run(waveforms):
+        features = processor(waveforms, sampling_rate=16000, return_tensors="pt").input_features.to(device)
+        with torch.inference_mode():
+            ids = model.generate(features)
+        return processor.batch_decode(ids, skip_special_tokens=True)
+
+    def baseline(audio):
+        return run([audio])[0]
+
+    def trim(audio):
+        audio = trim_silence(audio)
+        return run([audio])[0] if audio.size else ""
+
+    def longform(audio):
+        audio = trim_silence(audio)
+        if audio.size == 0:
+            return ""
+        return merge_transcripts(run(split_long_form(audio)))
+
+    samples = load_samples(args.samples)
+    if not samples:
+        raise SystemExit(f"{args.samples} 에 (오디오, .txt) 쌍이 없습니다.")
+
+    run([samples[0][1]])  # 워밍업
+
+    print(f"{'mode':<10} {'total s':>9} {'avg ms':>9} {'CER':>7}  (samples={len(samples)}, "
+          f"audio={sum(len(a) for _, a, _ in samples) / 16000:.1f}s)")
+    for name, fn in [("baseline", baseline), ("trim", trim), ("longform", longform)]:
+        errors = 0.0
+        start = time.perf_counter()
+        for _, audio, ref in samples:
+            errors += cer(ref, fn(audio))
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {elapsed:9.2f} {elapsed / len(samples) * 1000:9.1f} {errors / len(samples):7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+import torch
+
+
+class LogMelExtractor:
+    """WhisperFeatureExtractor 와 같은 log-mel 특징을 배치 단위 torch 연산으로 모델 디바이스에서 계산합니다.
+
+    mel 필터뱅크와 STFT 윈도우는 디바이스에 한 번만 올려 두고 재사용하며,
+    호스트 → 디바이스 복사는 배치 전체의 실제 샘플을 이어 붙인 버퍼 한 번으로 끝냅니다.
+    """
+
+    def __init__(self, feature_extractor, device="cpu"):
+        self.device = torch.device(device)
+        self.sampling_rate = feature_extractor.sampling_rate
+        self.n_fft = feature_extractor.n_fft
+        self.hop_length = feature_extractor.hop_length
+        self.n_samples = feature_extractor.n_samples
+        self.nb_max_frames = feature_extractor.nb_max_frames
+
+        # (n_freqs, n_mels) → 행렬곱에 바로 쓰도록 전치해서 보관
+        self.mel_filters = torch.from_numpy(
+            np.asarray(feature_extractor.mel_filters, dtype=np.float32)
+        ).T.contiguous().to(self.device)
+        self.window = torch.hann_window(self.n_fft, device=self.device)
+
+    def _pad_batch(self, waveforms):
+        # 30초 창에 맞게 자르고, 실제 길이만큼만 디바이스로 복사한 뒤 0 패딩 버퍼에 채움
+        clips = [torch.as_tensor(np.asarray(w, dtype=np.float32)[:self.n_samples]) for w in waveforms]
+        lengths = [len(c) for c in clips]
+        flat = torch.cat(clips) if clips else torch.zeros(0)
+        if self.device.type == "cuda":
+            flat = flat.pin_memory().to(self.device, non_blocking=True)
+        else:
+            flat = flat.to(self.device)
+
+        batch = torch.zeros(len(clips), self.n_samples, device=self.device)
+        offset = 0
+        for i, n in enumerate(lengths):
+            batch[i, :n] = flat[offset:offset + n]
+            offset += n
+        return batch
+
+    @torch.inference_mode()
+    def __call__(self, waveforms, dtype=torch.float32):
+        batch = self._pad_batch(waveforms)
+
+        stft = torch.stft(batch, self.n_fft, self.hop_length, window=self.window, return_complex=True)
+        magnitudes = stft[..., :-1].abs() ** 2
+
+        mel_spec = torch.matmul(self.mel_filters, magnitudes)
+        log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+        max_val = log_spec.amax(dim=(1, 2), keepdim=True)
+        log_spec = torch.maximum(log_spec, max_val - 8.0)
+        log_spec = (log_spec + 4.0) / 4.0
+        return log_spec[..., :self.nb_max_frames].to(dtype)
@@ -0,0 +1,39 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Whisper 입력 창은 30초. 창 경계에서 단어가 잘리지 않도록 겹쳐서 자릅니다.
+WINDOW_S = 28.0
+OVERLAP_S = 3.0
+
+
+def split_long_form(audio: np.ndarray, window_s=WINDOW_S, overlap_s=OVERLAP_S):
+    """window_s 를 넘는 녹음을 overlap_s 만큼 겹치는 창들로 나눕니다."""
+    window = int(window_s * SAMPLE_RATE)
+    if len(audio) <= window:
+        return [audio]
+
+    stride = window - int(overlap_s * SAMPLE_RATE)
+    chunks = []
+    for start in range(0, len(audio), stride):
+        chunks.append(audio[start:start + window])
+        if start + window >= len(audio):
+            break
+    return chunks
+
+
+def merge_transcripts(texts, max_overlap_words=8):
+    """겹친 구간 때문에 앞 창의 끝과 뒤 창의 시작에 중복된 단어를 한 번만 남기고 이어 붙입니다."""
+    merged = []
+    for text in texts:
+        words = text.split()
+        if not words:
+            continue
+        limit = min(max_overlap_words, len(merged), len(words))
+        overlap = 0
+        for n in range(limit, 0, -1):
+            if merged[-n:] == words[:n]:
+                overlap = n
+                break
+        merged.extend(words[overlap:])
+    return " ".join(merged)
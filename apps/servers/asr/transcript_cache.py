@@ -0,0 +1,68 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+def audio_key(data, model_id: str) -> str:
+    """오디오 바이트(또는 정규화된 PCM 배열)와 모델 식별자로 캐시 키를 만듭니다."""
+    h = hashlib.sha256()
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\0")
+    h.update(memoryview(data).cast("B"))
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """크기(max_entries)와 유효시간(ttl_s) 제한이 있는 LRU 인식 결과 캐시"""
+
+    def __init__(self, max_entries=512, ttl_s=600.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key, count_miss=True):
+        # 한 요청에서 여러 키를 차례로 조회할 때는 마지막 조회만 miss 로 셉니다.
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += count_miss
+            return None
+
+        text, stored_at = entry
+        if self.ttl_s > 0 and time.monotonic() - stored_at > self.ttl_s:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += count_miss
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (text, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
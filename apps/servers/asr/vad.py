@@ -0,0 +1,160 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def frame_energy_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    # 프레임별 RMS 에너지(dBFS)
+    n = len(audio) // frame_len
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n * frame_len].reshape(n, frame_len)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    return (20 * np.log10(rms + 1e-10)).astype(np.float32)
+
+
+class EnergyVAD:
+    """프레임 에너지 기반 음성 구간 검출기
+
+    잡음 바닥(noise floor)을 천천히 추적하고, 잡음보다 threshold_db 이상 큰 프레임을 음성으로 봅니다.
+    절대 하한(min_speech_db) 아래의 프레임은 항상 무음으로 처리합니다.
+    """
+
+    def __init__(self, frame_ms=30, threshold_db=12.0, min_speech_db=-50.0, noise_adapt=0.05):
+        self.frame_len = SAMPLE_RATE * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.min_speech_db = min_speech_db
+        self.noise_adapt = noise_adapt
+        self.noise_db = None
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        energy = frame_energy_db(frame, len(frame))[0]
+        if self.noise_db is None:
+            self.noise_db = min(energy, self.min_speech_db)
+
+        speech = energy > self.min_speech_db and energy > self.noise_db + self.threshold_db
+        if not speech:
+            # 무음 프레임으로만 잡음 바닥을 갱신
+            self.noise_db += self.noise_adapt * (energy - self.noise_db)
+        return speech
+
+
+class SpeechSegmenter:
+    """스트리밍 PCM 을 받아 발화 구간을 잘라 냅니다.
+
+    feed() 는 다음 이벤트 목록을 돌려줍니다.
+      ("segment", audio) : 짧은 쉼(pause_ms) 또는 최대 길이(max_segment_ms)에서 잘린 음성 구간
+      ("end", None)      : 음성 뒤 무음이 end_silence_ms 이상 이어져 발화가 끝났다고 판단한 시점
+    """
+
+    def __init__(self, vad=None, pause_ms=300, end_silence_ms=800, max_segment_ms=10000,
+                 pre_roll_ms=200, min_speech_ms=150):
+        self.vad = vad or EnergyVAD()
+        frame_ms = self.vad.frame_ms
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.end_frames = max(self.pause_frames, end_silence_ms // frame_ms)
+        self.max_frames = max(1, max_segment_ms // frame_ms)
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = []
+        self._segment = []
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._heard_speech = False
+
+    def feed(self, audio: np.ndarray):
+        events = []
+        frame_len = self.vad.frame_len
+        self._pending = np.concatenate([self._pending, audio.astype(np.float32, copy=False)])
+
+        n = len(self._pending) // frame_len
+        for i in range(n):
+            frame = self._pending[i * frame_len:(i + 1) * frame_len]
+            events.extend(self._push(frame))
+        self._pending = self._pending[n * frame_len:]
+        return events
+
+    def flush(self):
+        # 클라이언트가 발화 종료를 알린 경우: 남은 음성을 마지막 구간으로 내보냄
+        events = []
+        if self._segment and self._speech_frames >= self.min_speech_frames:
+            events.append(("segment", np.concatenate(self._segment)))
+        if self._heard_speech or events:
+            events.append(("end", None))
+        self.reset()
+        return events
+
+    def _push(self, frame):
+        events = []
+        speech = self.vad.is_speech(frame)
+
+        if not self._segment:
+            if not speech:
+                self._pre_roll.append(frame)
+                if len(self._pre_roll) > self.pre_roll_frames:
+                    self._pre_roll.pop(0)
+                if self._heard_speech:
+                    self._silence_frames += 1
+                    if self._silence_frames >= self.end_frames:
+                        events.append(("end", None))
+                        self._heard_speech = False
+                        self._silence_frames = 0
+                return events
+            # 음성 시작: 앞부분이 잘리지 않도록 pre-roll 을 붙임
+            self._segment = self._pre_roll + [frame]
+            self._pre_roll = []
+            self._speech_frames = 1
+            self._silence_frames = 0
+            return events
+
+        self._segment.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silence_frames = 0
+        else:
+            self._silence_frames += 1
+
+        if self._silence_frames >= self.pause_frames or len(self._segment) >= self.max_frames:
+            if self._speech_frames >= self.min_speech_frames:
+                events.append(("segment", np.concatenate(self._segment)))
+                self._heard_speech = True
+            self._segment = []
+            self._speech_frames = 0
+            if self._silence_frames >= self.end_frames and self._heard_speech:
+                events.append(("end", None))
+                self._heard_speech = False
+                self._silence_frames = 0
+        return events
+
+
+def trim_silence(audio: np.ndarray, frame_ms=30, threshold_db=12.0, min_speech_db=-50.0, max_noise_db=-45.0,
+                 quiet_margin_db=6.0, pad_ms=150):
+    """녹음 앞뒤의 무음을 잘라 냅니다.
+
+    잡음 바닥은 프레임 에너지의 하위 10% 로 추정하되 max_noise_db(dBFS) 를 넘지 않게 묶습니다
+    (앞뒤 무음 없이 바짝 잘린 녹음은 하위 10% 도 음성이라, 그대로 쓰면 작은 첫/끝 음절이 잘림).
+    잡음 바닥 + threshold_db 보다 quiet_margin_db 이상 작은 '확실한 무음' 프레임만 앞뒤에서 잘라 내고,
+    pad_ms 만큼 여유를 둡니다. 확실한 무음이 없으면 자르지 않고, 음성이 전혀 없으면 길이 0 배열을 돌려줍니다.
+    """
+    frame_len = SAMPLE_RATE * frame_ms // 1000
+    energy = frame_energy_db(audio, frame_len)
+    if len(energy) == 0:
+        return audio
+
+    noise_db = min(float(np.percentile(energy, 10)), max_noise_db)
+    threshold = max(noise_db + threshold_db, min_speech_db)
+    if not (energy > threshold).any():
+        # 잡음 바닥을 추정할 수 없을 만큼 고른 신호는 그대로 두고, 전부 하한 아래일 때만 무음으로 봅니다.
+        return audio if energy.max() > min_speech_db else audio[:0]
+
+    # 문턱 근처의 작은 소리(부드러운 시작/끝 음절)는 음성 쪽으로 남김
+    idx = np.flatnonzero(energy >= threshold - quiet_margin_db)
+    pad = SAMPLE_RATE * pad_ms // 1000
+    start = max(0, idx[0] * frame_len - pad)
+    end = min(len(audio), (idx[-1] + 1) * frame_len + pad)
+    return audio[start:end]
@@ -1,25 +1,25 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 import torch
-import torchaudio
-from transformers import WhisperForConditionalGeneration, WhisperProcessor
-from io import BytesIO
+import numpy as np
+import asyncio
+import json
 import logging
+import os
+import sys
+
+from audio_decode import AudioDecoder
+from backends import load_backend
+from features import LogMelExtractor
+from batcher import MicroBatcher
+from longform import merge_transcripts, split_long_form
+from transcript_cache import TranscriptCache, audio_key
+from vad import SpeechSegmenter, trim_silence
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.health import Health
+from common.startup import Startup
 
-import subprocess
-
-def convert_to_wav(audio_bytes: bytes) -> bytes:
-    p = subprocess.Popen(
-        ["ffmpeg", "-y",
-         "-i", "pipe:0",
-         "-ar", "16000",
-         "-ac", "1",
-         "-f", "wav",
-         "pipe:1"],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-    )
-    out, _ = p.communicate(audio_bytes)
-    return out
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -28,58 +28,235 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+
+# 16k 모노 WAV 는 프로세스 내에서 바로 디코딩, 나머지 포맷은 상주 디코더 워커 풀에서 처리
+# (워커는 모델 로딩 전에 fork 해 둡니다)
+DECODE_WORKERS = int(os.getenv("STT_DECODE_WORKERS", "2"))
+decoder = AudioDecoder(num_workers=DECODE_WORKERS)
+decoder.warmup()
+
 MODEL_DIR = "/data/bootcamp/final_project/asr_finetune/outputs/whisper-finetuned-ko-star-v1"
-processor = WhisperProcessor.from_pretrained(MODEL_DIR)
-model = WhisperForConditionalGeneration.from_pretrained(MODEL_DIR).to("cuda" if torch.cuda.is_available() else "cpu")
-logger.info("Whisper 모델 로딩 완료")
+# 추론 백엔드: torch(기본) | int8(CPU 동적 양자화) | onnx(ONNX Runtime)
+STT_BACKEND = os.getenv("STT_BACKEND", "torch")
+processor = model = feature_extractor = None
 
-@app.get("/health")
-def health():
-    try:
-        dummy = torch.zeros(1, 80, 3000).to(model.device)
-        _ = model.generate(dummy, max_new_tokens=1)
-        return JSONResponse({"status": "ok"})
-    except Exception as e:
-        logger.error("[x] STT health check failed", exc_info=e)
-        return JSONResponse({"status": "error", "detail": str(e)}, status_code=503)
+# 마이크로 배치 설정
+BATCH_MAX_SIZE = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("STT_BATCH_MAX_WAIT_MS", "10"))
+
+# log-mel 특징을 모델 디바이스에서 배치로 계산 (0 이면 WhisperProcessor 의 CPU 경로 사용)
+DEVICE_FEATURES = os.getenv("STT_DEVICE_FEATURES", "1") == "1"
+
+def extract_features(waveforms):
+    if DEVICE_FEATURES:
+        return feature_extractor(waveforms, dtype=getattr(model, "dtype", torch.float32))
+    return processor(
+        waveforms,
+        sampling_rate=16000,
+        return_tensors="pt"
+    ).input_features.to(model.device)
+
+def transcribe_batch(waveforms):
+    # 여러 요청의 16k 모노 파형을 한 번의 generate 로 처리
+    input_features = extract_features(waveforms)
+
+    with torch.inference_mode():
+        predicted_ids = model.generate(input_features)
+    return processor.batch_decode(predicted_ids, skip_special_tokens=True)
+
+batcher = MicroBatcher(transcribe_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+
+# 모델 로딩은 서버가 뜬 뒤 백그라운드에서 진행 (/live 는 바로 응답, /ready 는 워밍업까지 끝난 뒤 200)
+startup = Startup("whisper")
+
+def load_models():
+    global processor, model, feature_extractor
+    with startup.phase("load_model"):
+        processor, model = load_backend(
+            STT_BACKEND,
+            MODEL_DIR,
+            onnx_dir=os.getenv("STT_ONNX_DIR"),
+            cpu_threads=os.getenv("STT_CPU_THREADS"),
+        )
+        feature_extractor = LogMelExtractor(processor.feature_extractor, device=model.device)
+    logger.info("Whisper 모델 로딩 완료")
+    # 첫 요청이 CUDA 커널 선택 / 메모리 할당 비용을 치르지 않도록 1초 무음으로 한 번 인식
+    with startup.phase("warmup"):
+        transcribe_batch([np.zeros(16000, dtype=np.float32)])
+
+startup.install(app, load_models)
+
+# 앞뒤 무음 제거 / 30초 초과 녹음의 겹침 창 분할
+TRIM_SILENCE = os.getenv("STT_TRIM_SILENCE", "1") == "1"
+LONG_FORM = os.getenv("STT_LONG_FORM", "1") == "1"
+
+async def transcribe_waveform(waveform):
+    if TRIM_SILENCE:
+        waveform = trim_silence(waveform)
+        if waveform.size == 0:
+            return ""
+
+    if not LONG_FORM:
+        return await batcher.submit(waveform)
+
+    # 창들은 동시에 제출되어 한 배치로 묶입니다.
+    chunks = split_long_form(waveform)
+    texts = await asyncio.gather(*[batcher.submit(chunk) for chunk in chunks])
+    return merge_transcripts(texts) if len(texts) > 1 else texts[0]
+
+# 인식 결과 캐시 (재전송/재생 테스트용 중복 오디오는 generate 없이 바로 응답)
+CACHE_SIZE = int(os.getenv("STT_CACHE_SIZE", "512"))
+CACHE_TTL_S = float(os.getenv("STT_CACHE_TTL_S", "600"))
+# 같은 오디오라도 모델이나 전처리 설정이 바뀌면 결과가 달라지므로 키에 포함
+MODEL_ID = f"{MODEL_DIR}|{STT_BACKEND}|trim={int(TRIM_SILENCE)}|longform={int(LONG_FORM)}"
+transcript_cache = TranscriptCache(max_entries=CACHE_SIZE, ttl_s=CACHE_TTL_S)
+
+def cache_disabled(request: Request):
+    return (request.headers.get("x-stt-no-cache", "").lower() in ("1", "true")
+            or "no-cache" in request.headers.get("cache-control", "").lower())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await batcher.stop()
+    decoder.shutdown()
+
+# /health 는 추론 없이 캐시된 상태만 응답. 실제 인식 점검은 STT_HEALTH_PROBE_S 마다 백그라운드에서 (0 이면 끔)
+def health_probe():
+    input_features = extract_features([np.zeros(16000, dtype=np.float32)])
+    with torch.inference_mode():
+        model.generate(input_features, max_new_tokens=1)
+
+health = Health(
+    startup,
+    probe=health_probe,
+    interval_s=float(os.getenv("STT_HEALTH_PROBE_S", "60")),
+    queue_depth=lambda: batcher.queue_depth,
+    device=lambda: getattr(model, "device", None),
+)
+health.install(app)
 
 @app.post("/stt")
-async def transcribe(file: UploadFile = File(...)):
+async def transcribe(request: Request, file: UploadFile = File(...)):
     audio_bytes = await file.read()
+    use_cache = not cache_disabled(request)
 
-    # 1) 모든 입력 포맷 → WAV(16k, mono) 로 변환
-    try:
-        wav_bytes = convert_to_wav(audio_bytes)
-    except Exception as e:
-        logger.exception("[x] ffmpeg 변환 실패")
-        return JSONResponse({"error": "Audio conversion failed", "detail": str(e)}, status_code=400)
+    # 같은 업로드의 재전송은 디코딩 전에 원본 바이트 해시로 바로 응답
+    raw_key = audio_key(audio_bytes, MODEL_ID) if use_cache else None
+    if use_cache:
+        cached = transcript_cache.get(raw_key, count_miss=False)
+        if cached is not None:
+            return JSONResponse({"text": cached}, headers={"X-STT-Cache": "hit"})
 
-    # 2) 변환된 WAV 바이트를 torchaudio 로드
+    # 모든 입력 포맷 → 16k 모노 float32 파형
     try:
-        waveform, sampling_rate = torchaudio.load(BytesIO(wav_bytes))
+        waveform = await decoder.decode(audio_bytes)
     except Exception as e:
-        logger.exception("[x] torchaudio.load 실패")
-        return JSONResponse({"error": "Invalid audio format after conversion", "detail": str(e)}, status_code=400)
+        logger.exception("[x] 오디오 디코딩 실패")
+        return JSONResponse({"error": "Audio decoding failed", "detail": str(e)}, status_code=400)
 
+    if waveform.size == 0:
+        return JSONResponse({"error": "Empty audio"}, status_code=400)
 
-    if waveform.shape[0] > 1:
-        logger.info("멀티채널 입력 감지 → 모노 변환")
-        waveform = torch.mean(waveform, dim=0, keepdim=True)
+    # 포맷만 다른 같은 녹음은 정규화된 16k PCM 해시로 찾음
+    pcm_key = audio_key(waveform, MODEL_ID) if use_cache else None
+    if use_cache:
+        cached = transcript_cache.get(pcm_key)
+        if cached is not None:
+            transcript_cache.put(raw_key, cached)
+            return JSONResponse({"text": cached}, headers={"X-STT-Cache": "hit"})
 
-    if sampling_rate != 16000:
-        logger.info(f"샘플레이트 변환: {sampling_rate}Hz → 16000Hz")
-        resampler = torchaudio.transforms.Resample(orig_freq=sampling_rate, new_freq=16000)
-        waveform = resampler(waveform)
+    transcription = await transcribe_waveform(waveform)
 
-    input_features = processor(
-        waveform.squeeze(),
-        sampling_rate=16000,
-        return_tensors="pt"
-    ).input_features.to(model.device)
-
-    predicted_ids = model.generate(input_features)
-    transcription = processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+    if use_cache:
+        transcript_cache.put(pcm_key, transcription)
+        transcript_cache.put(raw_key, transcription)
 
     logger.info(f"인식 결과: {transcription}")
-    return JSONResponse({"text": transcription})
+    return JSONResponse({"text": transcription}, headers={"X-STT-Cache": "miss" if use_cache else "bypass"})
+
+# 스트리밍 STT 설정 (VAD 구간 분할)
+STREAM_PAUSE_MS = int(os.getenv("STT_STREAM_PAUSE_MS", "300"))
+STREAM_END_SILENCE_MS = int(os.getenv("STT_STREAM_END_SILENCE_MS", "800"))
+STREAM_MAX_SEGMENT_MS = int(os.getenv("STT_STREAM_MAX_SEGMENT_MS", "10000"))
+
+@app.websocket("/stt/stream")
+async def transcribe_stream(websocket: WebSocket):
+    """16kHz 모노 PCM16LE 바이너리 프레임을 받아 발화 구간마다 부분 인식 결과를 보냅니다.
+
+    서버 → 클라이언트 메시지:
+      {"type": "partial", "segment": n, "text": "..."}  VAD 로 잘린 구간의 인식 결과
+      {"type": "final", "text": "..."}                  발화 종료(무음 감지 또는 {"event": "end"}) 시 전체 결과
+      {"type": "error", "detail": "..."}                잘못된 프레임 (세션은 유지)
+    """
+    await websocket.accept()
+    if not startup.ready:
+        # 1013: Try Again Later
+        await websocket.close(code=1013)
+        return
+    segmenter = SpeechSegmenter(
+        pause_ms=STREAM_PAUSE_MS,
+        end_silence_ms=STREAM_END_SILENCE_MS,
+        max_segment_ms=STREAM_MAX_SEGMENT_MS,
+    )
+    texts = []
+    last_task = None
+    segment_count = 0
+    leftover = b""  # 홀수 길이 프레임의 마지막 바이트 (다음 프레임 앞에 붙임)
+
+    async def run_segment(index, audio, prev):
+        text = await batcher.submit(audio)
+        if prev is not None:
+            await prev  # 부분 결과는 구간 순서대로 전송
+        texts.append(text)
+        await websocket.send_json({"type": "partial", "segment": index, "text": text})
+
+    async def handle(events):
+        nonlocal last_task, segment_count
+        for kind, audio in events:
+            if kind == "segment":
+                last_task = asyncio.create_task(run_segment(segment_count, audio, last_task))
+                segment_count += 1
+            elif kind == "end":
+                if last_task is not None:
+                    await last_task
+                final = " ".join(t.strip() for t in texts if t.strip())
+                logger.info(f"스트리밍 인식 결과: {final}")
+                await websocket.send_json({"type": "final", "text": final})
+                texts.clear()
+                last_task = None
+                segment_count = 0
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                data = leftover + message["bytes"]
+                cut = len(data) - len(data) % 2
+                data, leftover = data[:cut], data[cut:]
+                if data:
+                    pcm = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+                    await handle(segmenter.feed(pcm))
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    await websocket.send_json({"type": "error", "detail": "JSON 객체 텍스트 프레임만 지원합니다."})
+                    continue
+                if event == "end":
+                    await handle(segmenter.flush())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if last_task is not None and not last_task.done():
+            last_task.cancel()
+
+@app.get("/stats")
+def stats():
+    return JSONResponse({
+        "batching": batcher.stats(),
+        "decode": decoder.stats(),
+        "cache": transcript_cache.stats(),
+    })
 
@@ -0,0 +1,154 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+def process_rss():
+    """프로세스 RSS (바이트), 알 수 없으면 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def device_memory(device=None):
+    """장치 메모리 (MB). CUDA 가 이 프로세스에서 초기화되어 있으면 torch 할당/예약량과 장치 전체 사용량,
+    아니면 프로세스 RSS 만 돌려줍니다 (CUDA 컨텍스트를 새로 만들지 않음)."""
+    torch = sys.modules.get("torch")
+    info = {"device": str(device) if device is not None else "cpu"}
+    if (torch is not None and info["device"].startswith("cuda")
+            and torch.cuda.is_available() and torch.cuda.is_initialized()):
+        free, total = torch.cuda.mem_get_info(device)
+        info.update({
+            "allocated_mb": round(torch.cuda.memory_allocated(device) / 1e6, 1),
+            "reserved_mb": round(torch.cuda.memory_reserved(device) / 1e6, 1),
+            "used_mb": round((total - free) / 1e6, 1),
+            "total_mb": round(total / 1e6, 1),
+        })
+    rss = process_rss()
+    info["rss_mb"] = round(rss / 1e6, 1) if rss is not None else None
+    return info
+
+
+class Health:
+    """/health: 추론 없이 캐시된 상태를 바로 돌려줍니다.
+
+    실제 추론으로 확인하는 깊은 점검(probe)은 interval_s 마다 백그라운드 스레드에서만 돌리고
+    (0 이면 끔), 그 결과(성공 여부, 지연)를 저장해 두었다가 /health 에 함께 보여 줍니다.
+    요청이 대기 중이면(queue_depth > 0) 환자 요청과 장치를 다투지 않도록 그 회차는 건너뜁니다.
+    queue_depth, device, extra 는 준비가 끝난 뒤 /health 호출마다 읽으므로 가벼운 함수여야 합니다.
+    """
+
+    def __init__(self, startup, probe=None, interval_s=60.0, queue_depth=None, device=None, extra=None):
+        self.startup = startup
+        self.probe = probe
+        self.interval_s = float(interval_s)
+        self.queue_depth = queue_depth
+        self.device = device
+        self.extra = extra
+        self.last_ok = None
+        self.last_error = None
+        self.last_latency_ms = None
+        self.last_at = None
+        self.running_since = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_probe(self):
+        """깊은 점검을 한 번 실행하고 성공 여부를 돌려줍니다."""
+        self.running_since = time.monotonic()
+        start = time.perf_counter()
+        try:
+            self.probe()
+            self.last_ok, self.last_error = True, None
+        except Exception as e:
+            self.last_ok, self.last_error = False, f"{type(e).__name__}: {e}"
+            self.failures += 1
+            logger.exception(f"[x] {self.startup.name} health probe 실패")
+        self.last_latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.last_at = time.monotonic()
+        self.running_since = None
+        self.runs += 1
+        return self.last_ok
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            if not self.startup.ready:
+                continue
+            if self.queue_depth is not None and self.queue_depth() > 0:
+                self.skipped += 1
+                continue
+            self.run_probe()
+
+    def start(self):
+        if self.probe is None or self.interval_s <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.startup.name}-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        startup = self.startup.status()
+        state = startup["status"]
+        if state == "ready":
+            state = "ok" if self.last_ok is not False else "error"
+        now = time.monotonic()
+        ready = self.startup.ready
+        body = {
+            "status": state,
+            "ready": ready,
+            "uptime_s": round(now - self.startup.started_at, 1),
+            "startup_error": startup["error"],
+            "probe": {
+                "interval_s": self.interval_s if self.probe is not None else 0.0,
+                "ok": self.last_ok,
+                "latency_ms": self.last_latency_ms,
+                "age_s": round(now - self.last_at, 1) if self.last_at is not None else None,
+                "running_s": round(now - self.running_since, 1) if self.running_since is not None else None,
+                "error": self.last_error,
+                "runs": self.runs,
+                "failures": self.failures,
+                "skipped": self.skipped,
+            },
+            "queue_depth": self.queue_depth() if ready and self.queue_depth is not None else None,
+            "memory": device_memory((self.device() if callable(self.device) else self.device) if ready else None),
+        }
+        if ready and self.extra is not None:
+            body.update(self.extra())
+        return body
+
+    def install(self, app):
+        """/health 를 등록하고 app 시작/종료에 맞춰 백그라운드 점검을 켜고 끕니다."""
+
+        @app.on_event("startup")
+        def start_probe():
+            self.start()
+
+        @app.on_event("shutdown")
+        def stop_probe():
+            self.stop()
+
+        @app.get("/health")
+        async def health():
+            body = self.status()
+            return JSONResponse(body, status_code=200 if body["status"] == "ok" else 503)
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Janitor:
+    """디렉터리의 파일을 유효시간(ttl_s)과 전체 크기(max_bytes) 안으로 정리합니다.
+
+    interval_s 마다 백그라운드 스레드에서 ttl_s 보다 오래된 파일을 지우고,
+    그래도 max_bytes 를 넘으면 수정 시각이 오래된 파일부터 지웁니다.
+    """
+
+    def __init__(self, directory, ttl_s=3600.0, max_bytes=256 * 1024 * 1024, interval_s=60.0, suffixes=(".wav",)):
+        self.directory = directory
+        self.ttl_s = float(ttl_s)
+        self.max_bytes = int(max_bytes)
+        self.interval_s = float(interval_s)
+        self.suffixes = tuple(suffixes)
+        self._stop = threading.Event()
+        self._thread = None
+        self.sweeps = 0
+        self.removed = 0
+        self.removed_bytes = 0
+        self.files = 0
+        self.total_bytes = 0
+
+    def sweep(self):
+        """한 번 정리하고 지운 파일 수를 돌려줍니다."""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not entry.name.endswith(self.suffixes):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.ttl_s and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            self.removed_bytes += size
+
+        self.sweeps += 1
+        self.removed += removed
+        self.files = len(files) - removed
+        self.total_bytes = total
+        if removed:
+            logger.info(f"[janitor] {self.directory}: {removed}개 삭제, 남은 용량 {total / 1e6:.1f}MB")
+        return removed
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception(f"[x] {self.directory} 정리 실패")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "files": self.files,
+            "mb": round(self.total_bytes / 1e6, 1),
+            "max_mb": round(self.max_bytes / 1e6, 1),
+            "ttl_s": self.ttl_s,
+            "sweeps": self.sweeps,
+            "removed": self.removed,
+            "removed_mb": round(self.removed_bytes / 1e6, 1),
+        }
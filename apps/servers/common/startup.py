@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# 로딩 중에도 응답하는 경로 (/health 는 캐시된 상태만 돌려주므로 로딩 중에도 안전)
+OPEN_PATHS = ("/live", "/ready", "/health")
+
+
+class Startup:
+    """모델 서버 기동 상태.
+
+    무거운 로딩(가중치, 워밍업)은 백그라운드 스레드에서 단계(phase)별로 시간을 재며 진행합니다.
+    /live 는 프로세스가 응답하면 항상 200, /ready 는 로딩과 워밍업이 끝난 뒤에만 200 이고,
+    그 전의 다른 요청은 503 (Retry-After) 으로 돌려보냅니다.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.phases = OrderedDict()
+        self.current = None
+        self.ready = False
+        self.error = None
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self._thread = None
+
+    @contextmanager
+    def phase(self, name):
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 3)
+            logger.info(f"[startup] {self.name} {name}: {self.phases[name]:.2f}s")
+        # 실패하면 current 를 남겨 두어 status() 의 error 에 어느 단계였는지 나오게 함
+        self.current = None
+
+    def start(self, load):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(load,), name=f"{self.name}-startup", daemon=True)
+        self._thread.start()
+
+    def _run(self, load):
+        try:
+            load()
+            self.ready = True
+            self.ready_at = time.monotonic()
+            logger.info(f"[o] {self.name} 준비 완료 ({self.ready_at - self.started_at:.1f}s)")
+        except Exception as e:
+            self.error = f"{self.current or 'startup'}: {e}"
+            logger.exception(f"[x] {self.name} 기동 실패")
+
+    def status(self):
+        if self.ready:
+            state = "ready"
+        elif self.error is not None:
+            state = "failed"
+        else:
+            state = "loading"
+        end = self.ready_at if self.ready_at is not None else time.monotonic()
+        return {
+            "status": state,
+            "phase": self.current,
+            "phases": dict(self.phases),
+            "elapsed_s": round(end - self.started_at, 3),
+            "error": self.error,
+        }
+
+    def install(self, app, load):
+        """app 시작 시 load 를 백그라운드로 실행하고 /live, /ready 와 준비 전 요청 차단을 등록합니다."""
+
+        @app.on_event("startup")
+        def start_loading():
+            self.start(load)
+
+        @app.middleware("http")
+        async def gate(request: Request, call_next):
+            if self.ready or request.url.path in OPEN_PATHS:
+                return await call_next(request)
+            return JSONResponse(self.status(), status_code=503, headers={"Retry-After": "5"})
+
+        @app.get("/live")
+        def live():
+            return JSONResponse({"status": "alive", "ready": self.ready})
+
+        @app.get("/ready")
+        def ready():
+            return JSONResponse(self.status(), status_code=200 if self.ready else 503)
@@ -0,0 +1,70 @@
+import logging
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+# bf16     : 기본 (GPU bf16, device_map=auto)
+# int8     : bitsandbytes 8bit 가중치 양자화 (GPU, bitsandbytes 필요)
+# 4bit     : bitsandbytes NF4 4bit 가중치 양자화 (GPU, bitsandbytes 필요)
+# cpu      : CPU fp32 (GPU 없는 엣지 장비용)
+# cpu-int8 : CPU 동적 int8 양자화 (nn.Linear 가중치)
+BACKENDS = ("bf16", "int8", "4bit", "cpu", "cpu-int8")
+
+
+def bnb_config(name):
+    try:
+        import bitsandbytes  # noqa: F401
+        from transformers import BitsAndBytesConfig
+    except ImportError as e:
+        raise RuntimeError(f"{name} 백엔드는 bitsandbytes 설치가 필요합니다.") from e
+
+    if name == "int8":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    return BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_quant_type="nf4",
+        bnb_4bit_compute_dtype=torch.bfloat16,
+        bnb_4bit_use_double_quant=True,
+    )
+
+
+def load_model(name, model_id):
+    if name in ("int8", "4bit"):
+        return AutoModelForCausalLM.from_pretrained(model_id, quantization_config=bnb_config(name),
+                                                    device_map="auto", torch_dtype=torch.bfloat16)
+    # CPU 백엔드도 low_cpu_mem_usage 로 safetensors 를 바로 매핑 (랜덤 초기화 후 덮어쓰는 과정 생략)
+    if name == "cpu":
+        return AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+    if name == "cpu-int8":
+        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+        model.eval()
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.bfloat16, device_map="auto")
+
+
+def load_backend(name, model_id, cpu_threads=None):
+    """(tokenizer, model) 을 돌려줍니다. 어느 백엔드든 GenerationScheduler 에서 같은 방식으로 forward 합니다."""
+    if name not in BACKENDS:
+        raise ValueError(f"지원하지 않는 LLM 백엔드: {name} (가능: {', '.join(BACKENDS)})")
+
+    if cpu_threads:
+        torch.set_num_threads(int(cpu_threads))
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = load_model(name, model_id)
+    model.eval()
+    logger.info(f"LLM 백엔드: {name} ({model_id}, device={model.device})")
+    return tokenizer, model
+
+
+def memory_bytes(device):
+    """모델이 올라간 장치의 현재 사용 메모리 (GPU 면 할당량, CPU 면 프로세스 RSS)"""
+    if device.type == "cuda":
+        return torch.cuda.memory_allocated(device)
+    try:
+        import psutil
+    except ImportError:
+        return 0
+    return psutil.Process().memory_info().rss
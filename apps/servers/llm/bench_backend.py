@@ -0,0 +1,113 @@
+"""LLM 백엔드 벤치마크 (bf16 / int8 / 4bit / cpu / cpu-int8)
+
+백엔드별로 모델을 올린 뒤 트리아지/길안내 프롬프트를 greedy 로 생성하면서
+로딩 시간, TTFT(time-to-first-token = prefill + 첫 토큰), 디코딩 tokens/s, 메모리를 측정합니다.
+메모리는 GPU 면 CUDA 할당량(peak 는 최대 할당량), CPU 면 로딩 전 대비 프로세스 RSS 증가분입니다.
+
+사용법:
+    python bench_backend.py --backends bf16,4bit,cpu-int8 [--model-id MODEL_ID] [--max-new-tokens 64]
+    python bench_backend.py --backends cpu,cpu-int8 --model-id ./tiny-llama --threads 4
+"""
+import argparse
+import gc
+import time
+
+import torch
+from transformers import DynamicCache
+
+from backends import load_backend, memory_bytes
+from prompts import PROMPT_DIRECTION, PROMPT_TRIAGE_STEP1
+
+PROMPTS = [
+    (PROMPT_TRIAGE_STEP1, "머리가 너무 아프고 어지러워요"),
+    (PROMPT_DIRECTION, "정형외과 어디에 있나요?"),
+]
+
+
+def sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+@torch.inference_mode()
+def run(model, input_ids, max_new_tokens, eos_ids):
+    """greedy 생성. (TTFT 초, 디코딩 시간 초, 디코딩 토큰 수)"""
+    device = model.device
+    sync(device)
+    start = time.perf_counter()
+    out = model(input_ids=input_ids, past_key_values=DynamicCache(), use_cache=True)
+    token = out.logits[:, -1].argmax(-1, keepdim=True)
+    sync(device)
+    ttft = time.perf_counter() - start
+
+    cache, decoded = out.past_key_values, 0
+    start = time.perf_counter()
+    for _ in range(max_new_tokens - 1):
+        if int(token) in eos_ids:
+            break
+        out = model(input_ids=token, past_key_values=cache, use_cache=True)
+        cache = out.past_key_values
+        token = out.logits[:, -1].argmax(-1, keepdim=True)
+        decoded += 1
+    sync(device)
+    return ttft, time.perf_counter() - start, decoded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-id", default="MLP-KTLim/llama-3-Korean-Bllossom-8B")
+    parser.add_argument("--backends", default="bf16,int8,4bit")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'backend':<9} {'load s':>7} {'mem MB':>8} {'peak MB':>8} {'TTFT ms':>8} {'tok/s':>7}")
+    for name in args.backends.split(","):
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+            torch.cuda.reset_peak_memory_stats()
+        rss = memory_bytes(torch.device("cpu"))
+
+        start = time.perf_counter()
+        try:
+            tokenizer, model = load_backend(name, args.model_id, cpu_threads=args.threads)
+        except Exception as e:
+            print(f"{name:<9} 로딩 실패: {e}")
+            continue
+        load_s = time.perf_counter() - start
+        device = model.device
+        base = 0 if device.type == "cuda" else rss
+        loaded = memory_bytes(device) - base
+
+        eos_ids = {tokenizer.eos_token_id}
+        if model.generation_config.eos_token_id is not None:
+            eos = model.generation_config.eos_token_id
+            eos_ids |= set(eos if isinstance(eos, (list, tuple)) else [eos])
+
+        ttfts, decode_s, decoded = [], 0.0, 0
+        for system_prompt, user_text in PROMPTS:
+            input_ids = tokenizer.apply_chat_template(
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_text}],
+                add_generation_prompt=True, return_tensors="pt").to(device)
+            run(model, input_ids, 2, eos_ids)  # 워밍업
+            for _ in range(args.repeat):
+                ttft, seconds, tokens = run(model, input_ids, args.max_new_tokens, eos_ids)
+                ttfts.append(ttft)
+                decode_s += seconds
+                decoded += tokens
+
+        if device.type == "cuda":
+            peak = torch.cuda.max_memory_allocated(device)
+        else:
+            peak = memory_bytes(device) - base
+        tok_s = decoded / decode_s if decode_s else 0.0
+        print(f"{name:<9} {load_s:7.1f} {loaded / 1e6:8.0f} {peak / 1e6:8.0f} "
+              f"{sum(ttfts) / len(ttfts) * 1000:8.1f} {tok_s:7.1f}")
+
+        del model, tokenizer
+
+
+if __name__ == "__main__":
+    main()
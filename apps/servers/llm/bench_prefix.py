@@ -0,0 +1,86 @@
+"""시스템 프롬프트 KV prefix 캐시 벤치마크
+
+시스템 프롬프트(트리아지 1/2단계, 길안내)마다 전체 prompt 를 prefill 할 때와
+캐시된 prefix KV 뒤의 사용자 메시지만 prefill 할 때의 토큰 수 / 시간을 비교합니다.
+첫 토큰(greedy)이 같은지도 함께 확인합니다.
+
+사용법:
+    python bench_prefix.py [--model-id MODEL_ID] [--batch-size 1] [--repeat 10]
+"""
+import argparse
+import time
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from prefix_cache import PrefixCache, chat_prefix_ids
+from prompts import PROMPT_TRIAGE_STEP1, PROMPT_TRIAGE_STEP2, PROMPT_DIRECTION
+from scheduler import GenerationRequest, GenerationScheduler
+
+CASES = [
+    ("triage_step1", PROMPT_TRIAGE_STEP1, "머리가 너무 아프고 어지러워요"),
+    ("triage_step2", PROMPT_TRIAGE_STEP2, "홍길동님 신경과로 접수해 주세요"),
+    ("direction", PROMPT_DIRECTION, "정형외과 어디에 있나요?"),
+]
+
+
+def sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def prefill(scheduler, input_ids, batch_size):
+    requests = [GenerationRequest(input_ids=list(input_ids)) for _ in range(batch_size)]
+    _, _, _, tokens = scheduler._prefill(requests)
+    return tokens
+
+
+def timed(scheduler, input_ids, batch_size, repeat):
+    tokens = prefill(scheduler, input_ids, batch_size)
+    sync(scheduler.device)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        prefill(scheduler, input_ids, batch_size)
+    sync(scheduler.device)
+    return (time.perf_counter() - start) / repeat * 1000, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-id", default="MLP-KTLim/llama-3-Korean-Bllossom-8B")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_id)
+    model = AutoModelForCausalLM.from_pretrained(args.model_id, torch_dtype=torch.bfloat16, device_map="auto")
+    model.eval()
+
+    cache = PrefixCache()
+    scheduler = GenerationScheduler(model, tokenizer, prefix_cache=cache)
+    for name, system_prompt, _ in CASES:
+        cache.register(name, chat_prefix_ids(tokenizer, scheduler.encode, system_prompt))
+    scheduler.prime_prefixes()
+    print(f"prefix KV: {cache.stats()['bytes'] / 1e6:.1f}MB")
+
+    print(f"{'prompt':<14} {'tokens':>6} {'prefill':>7} {'full ms':>8} {'cached ms':>9} {'saved ms':>8} {'same':>5}")
+    with torch.inference_mode():
+        for name, system_prompt, user_text in CASES:
+            prompt = tokenizer.apply_chat_template(
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_text}],
+                tokenize=False, add_generation_prompt=True)
+            input_ids = scheduler.encode(prompt)
+            skip = len(cache.match(input_ids).input_ids)
+
+            scheduler.prefix_cache = None
+            full_ms, full_tokens = timed(scheduler, input_ids, args.batch_size, args.repeat)
+            scheduler.prefix_cache = cache
+            cached_ms, cached_tokens = timed(scheduler, input_ids, args.batch_size, args.repeat)
+
+            same = bool(torch.equal(full_tokens, cached_tokens))
+            print(f"{name:<14} {len(input_ids):>6} {len(input_ids) - skip:>7} {full_ms:8.1f} {cached_ms:9.1f} "
+                  f"{full_ms - cached_ms:8.1f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
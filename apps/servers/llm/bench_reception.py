@@ -0,0 +1,85 @@
+"""접수 내역 저장소 벤치마크
+
+합성 접수 데이터(기본 10만 건)를 SQLite(WAL) 저장소에 일괄 적재하고,
+인덱스 조회 / 프로세스 내 캐시 조회 / 한국어로 읽은 전화번호 조회 시간을 측정합니다.
+
+사용법:
+    python bench_reception.py [--rows 100000] [--lookups 10000] [--db /tmp/bench_reception.db]
+"""
+import argparse
+import os
+import random
+import time
+
+from reception import ReceptionStore
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = "민서지현우준영수진하은도윤예성태희연재호경"
+DEPTS = ["내과", "정형외과", "신경과", "이비인후과", "피부과", "안과", "소아청소년과", "재활의학과"]
+SPOKEN = "공일이삼사오육칠팔구"
+
+
+def synthetic_rows(n, rng):
+    rows = []
+    for _ in range(n):
+        name = rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN)
+        phone = f"010-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}"
+        rows.append((name, phone, rng.choice(DEPTS), "2025년 7월 29일", f"오전 {rng.randrange(9, 12)}시"))
+    return rows
+
+
+def spoken(phone):
+    return " ".join("".join(SPOKEN[int(d)] for d in part) for part in phone.split("-"))
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    found = sum(fn(*item) is not None for item in items)
+    return (time.perf_counter() - start) / len(items) * 1e6, found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--db", default="/tmp/bench_reception.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    rng = random.Random(0)
+    rows = synthetic_rows(args.rows, rng)
+    store = ReceptionStore(args.db, cache_size=args.lookups)
+
+    start = time.perf_counter()
+    store.bulk_add(rows)
+    elapsed = time.perf_counter() - start
+    print(f"bulk load : {args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s), count={store.count()}")
+
+    plan = store._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT name, phone, dept, date, time FROM receptions "
+        "WHERE phone_key = ? AND name_key = ? ORDER BY id DESC LIMIT 1", ("0", "x")).fetchall()
+    print(f"plan      : {' / '.join(row[-1] for row in plan)}")
+
+    sample = rng.sample(rows, min(args.lookups, len(rows)))
+    queries = [(name, phone) for name, phone, *_ in sample]
+    store.clear_cache()
+    cold, found = timed(store.lookup, queries)
+    print(f"lookup    : {cold:8.1f} us/query (index, found {found}/{len(queries)})")
+    warm, found = timed(store.lookup, queries)
+    print(f"cached    : {warm:8.1f} us/query (found {found}/{len(queries)})")
+
+    store.clear_cache()
+    spoken_queries = [(name + "입니다", spoken(phone)) for name, phone in queries]
+    cold, found = timed(store.lookup, spoken_queries)
+    print(f"spoken    : {cold:8.1f} us/query (\"{spoken_queries[0][1]}\", found {found}/{len(queries)})")
+
+    missing = [(name, "010-0000-000" + str(i % 10)) for i, (name, _) in enumerate(queries)]
+    miss, found = timed(store.lookup, missing)
+    print(f"not found : {miss:8.1f} us/query (found {found}/{len(queries)})")
+
+
+if __name__ == "__main__":
+    main()
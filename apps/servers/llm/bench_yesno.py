@@ -0,0 +1,41 @@
+"""예/아니오 판정 회귀 점검
+
+확인 단계에서 나오는 대답 사례를 사전 판정(rule_classify)에 넣어 기대한 라벨과 비교합니다.
+None 은 사전으로 확정하지 않고 LLM 에 넘겨야 하는 대답입니다. 틀린 사례가 있으면 종료 코드 1.
+
+사용법:
+    python bench_yesno.py
+"""
+import sys
+
+from yesno import NO, UNKNOWN, YES, rule_classify
+
+CASES = [
+    ("네", YES), ("네 맞아요", YES), ("맞습니다.", YES), ("응 접수해줘", YES), ("어", YES), ("엉.", YES),
+    ("아니요", NO), ("아니 틀렸어요", NO), ("안 맞아요", NO), ("맞지 않아요", NO), ("취소해주세요", NO),
+    ("모르겠어요", UNKNOWN), ("글쎄요", UNKNOWN),
+    # 거절 (말다 / 필요 없다)
+    ("하지 마세요", NO), ("해주지 마세요", NO), ("접수하지 마", NO), ("진행하지 말아요", NO),
+    ("네 필요없어요", NO), ("접수 말고요", NO), ("하지마", NO),
+    # 되물음은 LLM 으로
+    ("어?", None), ("엉?", None), ("웅?", None),
+    # 섞인 대답은 확정하지 않음
+    ("네 모르겠어요", None), ("네 잘 모르겠는데요", None), ("맞는지 모르겠어요", UNKNOWN),
+]
+
+
+def main():
+    wrong = 0
+    decided = 0
+    for text, expected in CASES:
+        label = rule_classify(text)
+        decided += label is not None
+        if label != expected:
+            wrong += 1
+            print(f"[x] {text!r}: {label} (기대 {expected})")
+    print(f"사례 {len(CASES)}개, 틀림 {wrong}개, 사전으로 확정 {decided}개")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import json
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+# 한글 음절 → 자모 분해용 (초성 19, 중성 21, 종성 28)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# "정형외과 어디에 있나요?" 같은 질의에서 장소명 뒤에 붙는 말
+TRAILING = re.compile(r"(어디(에|로)?(있(나요|어요|습니까|어|니)?|예요|에요|야|요|죠)?|가는길|가려면|위치|는|은|이|가|로|으로|에|요)+$")
+
+
+def normalize(text: str) -> str:
+    return "".join(re.findall(r"[가-힣a-z0-9]+", text.lower()))
+
+
+def to_jamo(text: str) -> str:
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(CHOSEONG[code // 588])
+            out.append(JUNGSEONG[(code % 588) // 28])
+            if code % 28:
+                out.append(JONGSEONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def has_batchim(word: str) -> bool:
+    code = ord(word[-1]) - 0xAC00 if word else -1
+    return 0 <= code < 11172 and code % 28 != 0
+
+
+def josa(word: str, with_batchim: str, without: str) -> str:
+    return word + (with_batchim if has_batchim(word) else without)
+
+
+@dataclass
+class Place:
+    name: str
+    building: str
+    floor: str
+    route: str
+    aliases: list = field(default_factory=list)
+    elevator: str = ""
+    stairs: str = ""
+
+
+def load_places(path: str):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("kiosk", {}), [Place(**p) for p in data["places"]]
+
+
+class DirectionIndex:
+    """장소 이름/별칭 색인. ASR 오인식을 고려해 포함 관계 → 자모 단위 유사도 순으로 찾습니다."""
+
+    def __init__(self, places, kiosk=None, threshold=0.8):
+        self.places = list(places)
+        self.kiosk = kiosk or {}
+        self.threshold = float(threshold)
+        self._aliases = {}
+        for place in self.places:
+            for alias in [place.name] + place.aliases:
+                key = normalize(alias)
+                if key:
+                    self._aliases.setdefault(key, place)
+        # 긴 별칭 우선 ("정형외과" 가 "외과" 보다 먼저)
+        self._ordered = sorted(self._aliases, key=len, reverse=True)
+        self._jamo = {key: to_jamo(key) for key in self._ordered}
+        # seq2 쪽 색인을 미리 만들어 두고 질의 구간만 바꿔 가며 비교
+        self._matchers = {key: SequenceMatcher(None, "", self._jamo[key]) for key in self._ordered}
+
+    def match(self, text: str):
+        """(Place, score) 또는 (None, 최고 점수) 를 돌려줍니다."""
+        query = TRAILING.sub("", normalize(text)) or normalize(text)
+        if not query:
+            return None, 0.0
+        if query in self._aliases:
+            return self._aliases[query], 1.0
+
+        # 별칭 길이 ±1 글자 구간마다 자모 유사도를 재고, 더 길게 맞은 별칭을 우선
+        # ("정영외과" 는 "외과" 전체보다 "정형외과" 와 맞는 것으로 봄)
+        chars = [to_jamo(ch) for ch in query]
+        best_key, best_score, best_weight = None, 0.0, 0.0
+        for key in self._ordered:
+            target = self._jamo[key]
+            matcher = self._matchers[key]
+            score = 0.0
+            for n in {max(1, len(key) - 1), len(key), len(key) + 1}:
+                for start in range(0, max(0, len(query) - n) + 1):
+                    matcher.set_seq1("".join(chars[start:start + n]))
+                    if matcher.real_quick_ratio() > score and matcher.quick_ratio() > score:
+                        score = max(score, matcher.ratio())
+            weight = score * len(target)
+            if score >= self.threshold and weight > best_weight:
+                best_key, best_score, best_weight = key, score, weight
+            elif best_key is None:
+                best_score = max(best_score, score)
+        if best_key is not None:
+            return self._aliases[best_key], best_score
+        return None, best_score
+
+    def answer(self, place: Place) -> str:
+        sentences = [f"{josa(place.name, '은', '는')} {place.building} {place.floor}에 있습니다."]
+        same_floor = place.building == self.kiosk.get("building") and place.floor == self.kiosk.get("floor")
+        if place.elevator and not same_floor:
+            sentences.append(f"{josa(place.elevator, '을', '를')} 타고 {place.floor}에서 내리신 뒤 {place.route}")
+        else:
+            sentences.append(place.route)
+        if place.stairs and not same_floor:
+            sentences.append(f"{josa(place.stairs, '을', '를')} 이용하셔도 됩니다.")
+        return " ".join(sentences)
+
+
+class DirectionService:
+    """1단계 장소 색인 → 2단계 이전에 생성한 안내 문구 캐시 → 3단계 LLM 순으로 길안내 응답을 만듭니다."""
+
+    def __init__(self, index: DirectionIndex, llm_answer, cache_size=256):
+        self.index = index
+        self.llm_answer = llm_answer
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.tiers = Counter()
+
+    async def answer(self, target: str, session=None) -> str:
+        place, _ = self.index.match(target)
+        if place is not None:
+            self.tiers["index"] += 1
+            return self.index.answer(place)
+
+        key = TRAILING.sub("", normalize(target)) or normalize(target)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.tiers["cache"] += 1
+                return self._cache[key]
+
+        response = await self.llm_answer(target, session)
+        self.tiers["llm"] += 1
+        if response and key:
+            with self._lock:
+                self._cache[key] = response
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+    def stats(self):
+        total = sum(self.tiers.values())
+        return {
+            "places": len(self.index.places),
+            "index": self.tiers["index"],
+            "cache": self.tiers["cache"],
+            "llm": self.tiers["llm"],
+            "llm_ratio": round(self.tiers["llm"] / total, 3) if total else 0.0,
+            "cache_entries": len(self._cache),
+        }
@@ -0,0 +1,69 @@
+import threading
+
+
+class HistoryWindow:
+    """대화 메시지 리스트를 토큰 예산 안으로 유지하는 슬라이딩 윈도우.
+
+    - 맨 앞의 system 메시지는 항상 남기고(시스템 프롬프트 KV 캐시가 계속 적중하도록),
+      가장 오래된 대화부터 지워 prompt 가 max_tokens 이하가 되게 합니다.
+    - 예산과 무관하게 system 외 메시지는 max_messages 개까지만 보관합니다.
+    - 마지막 메시지(이번 사용자 입력)는 예산을 넘더라도 지우지 않습니다.
+    """
+
+    def __init__(self, render, encode, max_tokens=1024, max_messages=16):
+        self.render = render
+        self.encode = encode
+        self.max_tokens = int(max_tokens)
+        self.max_messages = max(1, int(max_messages))
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed_messages = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.total_prompt_tokens = 0
+
+    def fit(self, messages: list) -> list:
+        """messages 를 제자리에서 잘라 내고, 렌더링된 prompt 의 토큰 리스트를 돌려줍니다."""
+        keep = 0
+        while keep < len(messages) and messages[keep]["role"] == "system":
+            keep += 1
+
+        trimmed = self._drop_oldest(messages, keep, len(messages) - keep - self.max_messages)
+        input_ids = self.encode(self.render(messages))
+        while len(input_ids) > self.max_tokens and len(messages) - keep > 1:
+            trimmed += self._drop_oldest(messages, keep, 1)
+            input_ids = self.encode(self.render(messages))
+
+        with self._lock:
+            self.prompts += 1
+            self.trimmed_messages += trimmed
+            self.last_prompt_tokens = len(input_ids)
+            self.max_prompt_tokens = max(self.max_prompt_tokens, len(input_ids))
+            self.total_prompt_tokens += len(input_ids)
+        return input_ids
+
+    @staticmethod
+    def _drop_oldest(messages, keep, count):
+        dropped = 0
+        while count > 0 and len(messages) - keep > 1:
+            del messages[keep]
+            dropped += 1
+            count -= 1
+            # 대화는 항상 user 메시지로 시작하도록 짝이 끊긴 assistant 응답도 함께 제거
+            while len(messages) - keep > 1 and messages[keep]["role"] == "assistant":
+                del messages[keep]
+                dropped += 1
+                count -= 1
+        return dropped
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_tokens": self.max_tokens,
+                "max_messages": self.max_messages,
+                "prompts": self.prompts,
+                "trimmed_messages": self.trimmed_messages,
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "avg_prompt_tokens": round(self.total_prompt_tokens / self.prompts, 1) if self.prompts else 0.0,
+            }
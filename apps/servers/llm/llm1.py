@@ -1,75 +1,107 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from transformers import pipeline
-import torch
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import contextvars
 import logging
+import os
 import re
+import sys
+
+from backends import load_backend
+from scheduler import GenerationScheduler
+from prefix_cache import PrefixCache, chat_prefix_ids
+from directions import DirectionIndex, DirectionService, josa, load_places
+from history import HistoryWindow
+from prompts import PROMPT_TRIAGE_STEP1, PROMPT_TRIAGE_STEP2, PROMPT_TRIAGE_LABEL, PROMPT_LOOKUP, PROMPT_DIRECTION
+from reception import DEFAULT_DB_PATH, ReceptionStore
+from session import DialogSession, SessionStore
+from triage import SymptomClassifier, load_departments
+from streaming import SentenceSplitter, sse
+from yesno import NO, UNKNOWN, YES, YesNoClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.health import Health
+from common.startup import Startup
 
 app = FastAPI()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 모델 로딩
-try:
-    model_id = "MLP-KTLim/llama-3-Korean-Bllossom-8B"
-    pipe = pipeline(
-        "text-generation",
-        model=model_id,
-        model_kwargs={"torch_dtype": torch.bfloat16},
-        device_map="auto"
+# 모델 로딩 (LLM_BACKEND: bf16 | int8 | 4bit | cpu | cpu-int8, 테스트용 작은 모델은 LLM_MODEL_ID 로 지정)
+# 실제 로딩은 서버가 뜬 뒤 load_models() 에서 백그라운드로 진행합니다 (/live, /ready 참고)
+LLM_MODEL_ID = os.getenv("LLM_MODEL_ID", "MLP-KTLim/llama-3-Korean-Bllossom-8B")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "bf16")
+LLM_CPU_THREADS = os.getenv("LLM_CPU_THREADS")
+tokenizer = model = scheduler = eos_token_id = None
+
+# 고정 시스템 프롬프트의 KV 캐시 (0 이면 사용 안 함)
+PREFIX_CACHE_MB = float(os.getenv("LLM_PREFIX_CACHE_MB", "256"))
+prefix_cache = PrefixCache(max_bytes=PREFIX_CACHE_MB * 1024 * 1024) if PREFIX_CACHE_MB > 0 else None
+
+# 동적 배치 설정: 모든 세션의 생성 요청(분류/트리아지/길안내)을 하나의 배치로 처리
+MAX_BATCH = int(os.getenv("LLM_MAX_BATCH", "8"))
+BATCH_WAIT_MS = float(os.getenv("LLM_BATCH_WAIT_MS", "5"))
+
+# 트리아지/길안내 응답 생성 설정
+CHAT_GENERATION = dict(max_new_tokens=128, do_sample=True, temperature=0.5, top_p=0.9, repetition_penalty=1.2)
+
+# /llm/stream 요청을 처리하는 동안에만 설정되는 토큰 콜백 (예/아니오 분류 같은 내부 생성은 스트리밍하지 않음)
+stream_callback = contextvars.ContextVar("stream_callback", default=None)
+
+# 대화 이력 윈도우: 세션의 메시지 리스트를 토큰 예산 안으로 잘라 prompt 길이를 일정하게 유지
+history = HistoryWindow(
+    render=lambda messages: tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True),
+    encode=lambda text: scheduler.encode(text),
+    max_tokens=int(os.getenv("LLM_HISTORY_MAX_TOKENS", "1024")),
+    max_messages=int(os.getenv("LLM_HISTORY_MAX_MESSAGES", "16")),
+)
+
+async def chat(messages, session=None, **generation):
+    """generation 으로 CHAT_GENERATION 을 덮어씁니다 (labels / stop / mode). 라벨 생성은 스트리밍하지 않습니다."""
+    input_ids = history.fit(messages)
+    if session is not None:
+        session.prompt_tokens = len(input_ids)
+    options = {**CHAT_GENERATION, **generation}
+    on_text = None if options.get("labels") else stream_callback.get()
+    text = await scheduler.generate(input_ids, eos_token_id=eos_token_id, on_text=on_text, **options)
+    return text.strip()
+
+def register_prefixes():
+    if prefix_cache is None:
+        return
+    for name, system_prompt in [("triage_step1", PROMPT_TRIAGE_STEP1), ("triage_step2", PROMPT_TRIAGE_STEP2),
+                                ("direction", PROMPT_DIRECTION), ("triage_label", PROMPT_TRIAGE_LABEL_FILLED)]:
+        prefix_cache.register(name, chat_prefix_ids(tokenizer, scheduler.encode, system_prompt))
+    scheduler.prime_prefixes()
+    logger.info(f"[o] 시스템 프롬프트 KV 캐시 준비 완료: {prefix_cache.stats()['bytes'] / 1e6:.1f}MB")
+
+@app.on_event("shutdown")
+def shutdown():
+    if scheduler is not None:
+        scheduler.stop()
+
+# 세션별 상태 (키오스크마다 session_id 로 구분)
+SESSION_MAX = int(os.getenv("LLM_MAX_SESSIONS", "64"))
+SESSION_IDLE_S = float(os.getenv("LLM_SESSION_IDLE_S", "900"))
+
+def new_session(session_id):
+    return DialogSession(
+        session_id=session_id,
+        messages_triage_step1=[{"role": "system", "content": PROMPT_TRIAGE_STEP1}],
+        messages_triage_step2=[{"role": "system", "content": PROMPT_TRIAGE_STEP2}],
     )
-    pipe.model.eval()
-    eos_token_id = pipe.tokenizer.eos_token_id
-    logger.info("[o] LLM 모델 로딩 완료")
-except Exception as e:
-    logger.error(f"[x] 모델 로딩 실패: {e}")
-    raise RuntimeError("모델 로딩 실패")
-
-# 프롬프트
-PROMPT_TRIAGE_STEP1 = """당신은 병원 키오스크 접수 어시스턴트입니다.
-- 사용자가 말한 증상에 따라 가장 적절한 진료과 1개만 추천하세요.
-- 예: "그런 증상은 [진료과]가 적절합니다." 또는 "신경과를 추천드립니다."
-- **접수, 위치 안내, 대기시간 안내는 하지 마세요.**
-"""
-
-PROMPT_TRIAGE_STEP2 = """당신은 병원 키오스크 접수 어시스턴트입니다.
-- 이전에 추천한 진료과로 접수를 진행합니다.
-- 접수 완료 후 해당 진료과의 **위치**와 **예상 대기시간**을 안내하세요.
-- 이후에는 사용자의 질문에 친절하게 답변하세요.
-"""
-
-PROMPT_LOOKUP = """당신은 병원 키오스크 접수 내역 안내 도우미입니다.
-- 사용자가 이름과 전화번호를 말하면, 접수된 내역을 알려주세요.
-- 접수된 정보에는 진료과, 예약 날짜, 예약 시간이 포함되어야 합니다.
-- 접수된 정보가 없을 경우, '접수된 내역이 없습니다.'라고 안내해주세요.
-- 오늘은 2025년 7월 29일입니다.
-"""
-
-PROMPT_DIRECTION = """당신은 병원 길안내 키오스크 도우미입니다.
-- 사용자가 말한 진료과와 기타장소의 위치를 친절하고 간결하게 안내하세요.
-- 건물명, 층수, 방향, 엘레베이터 위치, 계단 위치 등을 포함해 실제 병원에서 길을 알려주는 것처럼 설명하세요.
-- 예: "정형외과는 본관 3층입니다. 오른쪽으로 가세요.", "피부과는 별관 2층 오른쪽으로 앞에 보이는 엘리베이터를 이용하세요."
-"""
-
-# 상태 및 사용자 정보
-messages_triage_step1 = [{"role": "system", "content": PROMPT_TRIAGE_STEP1}]
-messages_triage_step2 = [{"role": "system", "content": PROMPT_TRIAGE_STEP2}]
-reception_db = {}
-state = "IDLE"
-sub_state = None
-retry_count = 0
-triage_state = "WAIT_SYMPTOM"
-
-user_name = ""
-user_phone = ""
-user_address = ""
-user_symptom = ""
-lookup_name = ""
-lookup_phone = ""
-predicted_dept = ""
-
-# 예/아니오 분류기
-def classify_yes_or_no(text):
+
+sessions = SessionStore(new_session, max_sessions=SESSION_MAX, idle_timeout_s=SESSION_IDLE_S)
+
+# 접수 내역 (SQLite WAL, 여러 LLM 프로세스가 같은 파일을 공유)
+reception_store = ReceptionStore(
+    os.getenv("LLM_RECEPTION_DB", DEFAULT_DB_PATH),
+    cache_ttl_s=float(os.getenv("LLM_RECEPTION_CACHE_TTL_S", "30")),
+)
+
+# 예/아니오 분류기 (사전 매칭과 캐시로 판정하지 못한 애매한 대답만 LLM 으로)
+async def llm_classify_yes_or_no(text):
     prompt = f"""다음 사용자의 대답이 긍정인지 부정인지 판단해 주세요.
 - 가능한 응답은 반드시 '긍정', '부정', '모르겠음' 중 하나여야 합니다.
 - 다양한 표현도 고려하세요.
@@ -83,166 +115,320 @@ Q: 싫어 → A: 부정
 Q: 잘 모르겠어요 → A: 모르겠음
 Q: {text}
 A:"""
-    result = pipe(prompt, max_new_tokens=10, do_sample=False, temperature=0.0, return_full_text=False)
-    return result[0]["generated_text"].strip()
+    result = await scheduler.generate(prompt, max_new_tokens=10, do_sample=False, labels=[YES, NO, UNKNOWN], mode="yes_no")
+    return result.strip()
 
-# 헬스 체크
-@app.get("/health")
-def health():
-    try:
-        _ = pipe("사용자: 테스트\n키오스크:", max_new_tokens=1, do_sample=False)
-        return JSONResponse({"status": "ok"})
-    except Exception as e:
-        return JSONResponse({"status": "error", "detail": str(e)}, status_code=503)
+yes_no_classifier = YesNoClassifier(llm_classify_yes_or_no)
 
-# 메인 LLM API
-@app.post("/llm")
-async def generate(request: Request):
-    data = await request.json()
-    user_input = data.get("text", "").strip()
+async def classify_yes_or_no(text):
+    return await yes_no_classifier.classify(text)
 
-    global state, sub_state, retry_count
-    global user_name, user_phone, user_address, user_symptom
-    global lookup_name, lookup_phone, predicted_dept
+# 길안내: 장소 색인(건물/층/엘리베이터/계단) → 이전 생성 문구 캐시 → 색인에 없는 곳만 LLM
+async def llm_direction(target, session=None):
+    messages_direction = [{"role": "system", "content": PROMPT_DIRECTION}]
+    messages_direction.append({"role": "user", "content": f"{target} 어디에 있나요?"})
+    return await chat(messages_direction, session, mode="direction")
 
-    response = ""
+DIRECTIONS_PATH = os.getenv("LLM_DIRECTIONS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "directions.json"))
+kiosk_location, places = load_places(DIRECTIONS_PATH)
+directions = DirectionService(
+    DirectionIndex(places, kiosk_location, threshold=float(os.getenv("LLM_DIRECTION_MATCH_THRESHOLD", "0.8"))),
+    llm_direction,
+    cache_size=int(os.getenv("LLM_DIRECTION_CACHE", "256")),
+)
+logger.info(f"[o] 길안내 색인 로딩 완료: {len(places)}곳")
 
-    if user_input.lower() in ["종료", "고마워"]:
-        state = "IDLE"
-        return JSONResponse({"text": "이용해주셔서 감사합니다. 건강하세요!"})
+# 증상 → 진료과 분류기: 확신도가 낮을 때만 LLM 트리아지
+# LLM_TRIAGE_WORDING=template 이면 안내 문장도 고정 문구, llm 이면 분류된 진료과로 LLM 이 문장만 생성
+symptom_classifier = SymptomClassifier(load_departments(os.getenv(
+    "LLM_SYMPTOMS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "symptoms.json"))))
+TRIAGE_MIN_CONFIDENCE = float(os.getenv("LLM_TRIAGE_MIN_CONFIDENCE", "0.6"))
+TRIAGE_WORDING = os.getenv("LLM_TRIAGE_WORDING", "template")
+
+# 제약 생성: 진료과 이름만 생성(라벨) / 진료과가 나온 문장이 끝나면 멈춤(정지 패턴)
+PROMPT_TRIAGE_LABEL_FILLED = PROMPT_TRIAGE_LABEL.format(departments=", ".join(symptom_classifier.names))
+DEPARTMENT_STOP = re.compile(
+    "(?:" + "|".join(re.escape(name) for name in symptom_classifier.names) + r")[^.!?…\n]*(?:[.!?…]+(?=\s)|\n)")
+
+startup = Startup("llm")
+
+def load_models():
+    global tokenizer, model, scheduler, eos_token_id
+    with startup.phase("load_model"):
+        try:
+            tokenizer, model = load_backend(LLM_BACKEND, LLM_MODEL_ID, cpu_threads=LLM_CPU_THREADS)
+            eos_token_id = tokenizer.eos_token_id
+            logger.info("[o] LLM 모델 로딩 완료")
+        except Exception as e:
+            logger.error(f"[x] 모델 로딩 실패: {e}")
+            raise RuntimeError("모델 로딩 실패") from e
+        scheduler = GenerationScheduler(model, tokenizer, max_batch_size=MAX_BATCH,
+                                        max_wait_ms=BATCH_WAIT_MS, prefix_cache=prefix_cache)
+    with startup.phase("prefix_cache"):
+        register_prefixes()
+    # 첫 요청이 CUDA 커널 선택 / KV 캐시 할당 비용을 치르지 않도록 스케줄러 경로로 짧게 한 번 생성
+    with startup.phase("warmup"):
+        asyncio.run(chat([
+            {"role": "system", "content": PROMPT_DIRECTION},
+            {"role": "user", "content": "내과 어디에 있나요?"},
+        ], max_new_tokens=4, do_sample=False, mode="warmup"))
+
+startup.install(app, load_models)
+
+# 헬스 체크
+# /health 는 추론 없이 캐시된 상태만 응답. 실제 생성 점검은 LLM_HEALTH_PROBE_S 마다 백그라운드에서 (0 이면 끔)
+# 점검 요청도 스케줄러를 거치므로 환자 요청과 같은 배치에 섞여 처리됨
+def health_probe():
+    asyncio.run(scheduler.generate("사용자: 테스트\n키오스크:", max_new_tokens=1, do_sample=False, mode="health"))
+
+health = Health(
+    startup,
+    probe=health_probe,
+    interval_s=float(os.getenv("LLM_HEALTH_PROBE_S", "60")),
+    queue_depth=lambda: scheduler.queue_depth,
+    device=lambda: getattr(model, "device", None),
+    extra=lambda: {"active": scheduler.active},
+)
+health.install(app)
 
-    if state == "IDLE":
+# 대화 한 턴 처리
+async def run_turn(session: DialogSession, user_input: str) -> str:
+    response = ""
+
+    if session.state == "IDLE":
         if any(kw in user_input for kw in ["접수내역", "예약 확인", "내역 확인"]):
             response = "접수 내역을 확인하겠습니다. 이름을 말씀해주세요."
-            state = "CHECK_RECEIPT"
-            sub_state = "ASK_NAME"
+            session.state = "CHECK_RECEIPT"
+            session.sub_state = "ASK_NAME"
         elif "접수" in user_input:
             response = "접수를 시작하겠습니다. 이름을 말씀해주세요."
-            state = "ASK_NAME"
+            session.state = "ASK_NAME"
         elif any(kw in user_input for kw in ["길찾기", "위치", "어디야"]):
-            response = "어느 곳으로 가시나요?"
-            state = "FIND_DIRECTION"
+            # "내과 어디야" 처럼 장소까지 말했으면 되묻지 않고 바로 안내
+            if directions.index.match(user_input)[0] is not None:
+                response = await directions.answer(user_input, session)
+            else:
+                response = "어느 곳으로 가시나요?"
+                session.state = "FIND_DIRECTION"
         else:
             response = "죄송합니다. '접수', '접수내역확인', '길찾기' 중 하나로 말씀해주세요."
 
-    elif state == "ASK_NAME":
-        user_name = user_input
-        response = f"{user_name}님, 맞습니까?"
-        state = "CONFIRM_NAME"
+    elif session.state == "ASK_NAME":
+        session.user_name = user_input
+        response = f"{session.user_name}님, 맞습니까?"
+        session.state = "CONFIRM_NAME"
 
-    elif state == "CONFIRM_NAME":
-        judgment = classify_yes_or_no(user_input)
+    elif session.state == "CONFIRM_NAME":
+        judgment = await classify_yes_or_no(user_input)
         if "긍정" in judgment:
-            retry_count = 0
+            session.retry_count = 0
             response = "전화번호를 말씀해주세요."
-            state = "ASK_PHONE"
+            session.state = "ASK_PHONE"
         elif "부정" in judgment:
-            retry_count += 1
-            response = "다시 이름을 말씀해주세요." if retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
-            state = "ASK_NAME" if retry_count < 3 else "IDLE"
+            session.retry_count += 1
+            response = "다시 이름을 말씀해주세요." if session.retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
+            session.state = "ASK_NAME" if session.retry_count < 3 else "IDLE"
         else:
             response = "잘 이해하지 못했습니다. 맞으면 '네', 아니면 '아니오'라고 말씀해주세요."
 
-    elif state == "ASK_PHONE":
-        user_phone = user_input
-        response = f"{user_phone} 번호가 맞습니까?"
-        state = "CONFIRM_PHONE"
+    elif session.state == "ASK_PHONE":
+        session.user_phone = user_input
+        response = f"{session.user_phone} 번호가 맞습니까?"
+        session.state = "CONFIRM_PHONE"
 
-    elif state == "CONFIRM_PHONE":
-        judgment = classify_yes_or_no(user_input)
+    elif session.state == "CONFIRM_PHONE":
+        judgment = await classify_yes_or_no(user_input)
         if "긍정" in judgment:
-            retry_count = 0
+            session.retry_count = 0
             response = "주소를 말씀해주세요."
-            state = "ASK_ADDRESS"
+            session.state = "ASK_ADDRESS"
         elif "부정" in judgment:
-            retry_count += 1
-            response = "다시 전화번호를 말씀해주세요." if retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
-            state = "ASK_PHONE" if retry_count < 3 else "IDLE"
+            session.retry_count += 1
+            response = "다시 전화번호를 말씀해주세요." if session.retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
+            session.state = "ASK_PHONE" if session.retry_count < 3 else "IDLE"
         else:
             response = "잘 이해하지 못했습니다. 맞으면 '네', 아니면 '아니오'라고 말씀해주세요."
 
-    elif state == "ASK_ADDRESS":
-        user_address = user_input
-        response = f"{user_address} 주소가 맞습니까?"
-        state = "CONFIRM_ADDRESS"
+    elif session.state == "ASK_ADDRESS":
+        session.user_address = user_input
+        response = f"{session.user_address} 주소가 맞습니까?"
+        session.state = "CONFIRM_ADDRESS"
 
-    elif state == "CONFIRM_ADDRESS":
-        judgment = classify_yes_or_no(user_input)
+    elif session.state == "CONFIRM_ADDRESS":
+        judgment = await classify_yes_or_no(user_input)
         if "긍정" in judgment:
-            retry_count = 0
+            session.retry_count = 0
             response = "불편하신 증상을 말씀해주세요."
-            state = "ASK_SYMPTOM"
+            session.state = "ASK_SYMPTOM"
         elif "부정" in judgment:
-            retry_count += 1
-            response = "다시 주소를 말씀해주세요." if retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
-            state = "ASK_ADDRESS" if retry_count < 3 else "IDLE"
+            session.retry_count += 1
+            response = "다시 주소를 말씀해주세요." if session.retry_count < 3 else "입력 오류가 반복되었습니다. 직원을 호출하겠습니다."
+            session.state = "ASK_ADDRESS" if session.retry_count < 3 else "IDLE"
         else:
             response = "잘 이해하지 못했습니다. 맞으면 '네', 아니면 '아니오'라고 말씀해주세요."
 
-    elif state == "ASK_SYMPTOM":
-        user_symptom = user_input
-        messages_triage_step1.append({"role": "user", "content": user_symptom})
-        prompt = pipe.tokenizer.apply_chat_template(messages_triage_step1, tokenize=False, add_generation_prompt=True)
-        outputs = pipe(prompt, max_new_tokens=128, do_sample=True, temperature=0.5, top_p=0.9, repetition_penalty=1.2, eos_token_id=eos_token_id, return_full_text=False)
-        triage_response = outputs[0]["generated_text"].strip()
+    elif session.state == "ASK_SYMPTOM":
+        session.user_symptom = user_input
+        dept, confidence = symptom_classifier.classify(user_input)
+        confident = confidence >= TRIAGE_MIN_CONFIDENCE
+        symptom_classifier.record(confident)
+        if confident and TRIAGE_WORDING == "template":
+            triage_response = f"말씀하신 증상에는 {josa(dept, '이', '가')} 적절합니다."
+        elif confident:
+            # 진료과는 분류기가 정하고 LLM 은 안내 문장만 만듦
+            triage_response = await chat([
+                {"role": "system", "content": PROMPT_TRIAGE_STEP1},
+                {"role": "user", "content": f"{user_input}\n(추천할 진료과: {dept})"},
+            ], session, stop=DEPARTMENT_STOP, mode="triage")
+        elif TRIAGE_WORDING == "template":
+            # 확신도가 낮으면 LLM 이 진료과 이름만 고름 (몇 토큰이면 끝남)
+            dept = await chat([
+                {"role": "system", "content": PROMPT_TRIAGE_LABEL_FILLED},
+                {"role": "user", "content": user_input},
+            ], session, labels=symptom_classifier.names, max_new_tokens=16, mode="triage_label")
+            triage_response = f"말씀하신 증상에는 {josa(dept, '이', '가')} 적절합니다."
+        else:
+            session.messages_triage_step1.append({"role": "user", "content": session.user_symptom})
+            triage_response = await chat(session.messages_triage_step1, session, stop=DEPARTMENT_STOP, mode="triage")
+            match = re.search(r"([가-힣]+과)", triage_response)
+            dept = symptom_classifier.find_department(triage_response) or (match.group(1) if match else "해당 진료과")
+        logger.info(f"[LLM] 증상 분류: {dept} (confidence {confidence}{'' if confident else ', LLM 트리아지'})")
         response = triage_response + "\n\n이 진료과로 접수해 드릴까요?"
-        match = re.search(r"([가-힣]+과)", triage_response)
-        predicted_dept = match.group(1) if match else "해당 진료과"
-        state = "WAIT_TRIAGE_CONFIRM"
+        session.predicted_dept = dept
+        session.state = "WAIT_TRIAGE_CONFIRM"
 
-    elif state == "WAIT_TRIAGE_CONFIRM":
-        judgment = classify_yes_or_no(user_input)
+    elif session.state == "WAIT_TRIAGE_CONFIRM":
+        judgment = await classify_yes_or_no(user_input)
         if "긍정" in judgment:
-            messages_triage_step2.append({"role": "user", "content": f"{user_name}님 {predicted_dept}로 접수해 주세요"})
-            prompt = pipe.tokenizer.apply_chat_template(messages_triage_step2, tokenize=False, add_generation_prompt=True)
-            outputs = pipe(prompt, max_new_tokens=128, do_sample=True, temperature=0.5, top_p=0.9, repetition_penalty=1.2, eos_token_id=eos_token_id, return_full_text=False)
-            response = outputs[0]["generated_text"].strip()
-            reception_db[(user_name, user_phone)] = {
-                "dept": predicted_dept,
-                "date": "2025년 7월 29일",
-                "time": "오전 10시"
-            }
-            state = "IDLE"
+            session.messages_triage_step2.append({"role": "user", "content": f"{session.user_name}님 {session.predicted_dept}로 접수해 주세요"})
+            response = await chat(session.messages_triage_step2, session, mode="triage_step2")
+            # SQLite 쓰기/조회는 잠금 대기(최대 10초)가 있을 수 있어 이벤트 루프 밖에서 실행
+            await run_in_threadpool(reception_store.add, session.user_name, session.user_phone, session.predicted_dept, "2025년 7월 29일", "오전 10시")
+            session.state = "IDLE"
         elif "부정" in judgment:
             response = "접수를 원하지 않으시면 처음부터 다시 진행해 주세요."
-            state = "IDLE"
+            session.state = "IDLE"
         else:
             response = "잘 이해하지 못했습니다. 접수 원하시면 '네'라고 말씀해주세요."
 
-    elif state == "FINISH":
-        messages_triage_step2.append({"role": "user", "content": user_input})
-        prompt = pipe.tokenizer.apply_chat_template(messages_triage_step2, tokenize=False, add_generation_prompt=True)
-        outputs = pipe(prompt, max_new_tokens=128, do_sample=True, temperature=0.5, top_p=0.9, repetition_penalty=1.2, eos_token_id=eos_token_id, return_full_text=False)
-        response = outputs[0]["generated_text"].strip()
-        state = "IDLE"
-
-    elif state == "CHECK_RECEIPT":
-        if sub_state == "ASK_NAME":
-            lookup_name = user_input
-            response = f"{lookup_name}님, 전화번호를 말씀해주세요."
-            sub_state = "ASK_PHONE"
-        elif sub_state == "ASK_PHONE":
-            lookup_phone = user_input
-            key = (lookup_name, lookup_phone)
-            if key in reception_db:
-                info = reception_db[key]
-                response = f"{lookup_name}님은 {info['date']} {info['time']}에 {info['dept']}로 접수되어 있습니다."
+    elif session.state == "FINISH":
+        session.messages_triage_step2.append({"role": "user", "content": user_input})
+        response = await chat(session.messages_triage_step2, session, mode="triage_step2")
+        session.state = "IDLE"
+
+    elif session.state == "CHECK_RECEIPT":
+        if session.sub_state == "ASK_NAME":
+            session.lookup_name = user_input
+            response = f"{session.lookup_name}님, 전화번호를 말씀해주세요."
+            session.sub_state = "ASK_PHONE"
+        elif session.sub_state == "ASK_PHONE":
+            session.lookup_phone = user_input
+            info = await run_in_threadpool(reception_store.lookup, session.lookup_name, session.lookup_phone)
+            if info is not None:
+                response = f"{info['name']}님은 {info['date']} {info['time']}에 {info['dept']}로 접수되어 있습니다."
             else:
                 response = "접수된 내역이 없습니다."
-            state = "IDLE"
-            sub_state = None
-            lookup_name = ""
-            lookup_phone = ""
-
-    elif state == "FIND_DIRECTION":
-        direction_target = user_input.strip()
-        messages_direction = [{"role": "system", "content": PROMPT_DIRECTION}]
-        messages_direction.append({"role": "user", "content": f"{direction_target} 어디에 있나요?"})
-        prompt = pipe.tokenizer.apply_chat_template(messages_direction, tokenize=False, add_generation_prompt=True)
-        outputs = pipe(prompt, max_new_tokens=128, do_sample=True, temperature=0.5, top_p=0.9, repetition_penalty=1.2, eos_token_id=eos_token_id, return_full_text=False)
-        response = outputs[0]["generated_text"].strip()
-        state = "IDLE"
-
-    logger.info(f"[LLM] 입력: {user_input}")
-    logger.info(f"[LLM] 응답: {response}")
-    return JSONResponse({"text": response})
+            session.state = "IDLE"
+            session.sub_state = None
+            session.lookup_name = ""
+            session.lookup_phone = ""
+
+    elif session.state == "FIND_DIRECTION":
+        response = await directions.answer(user_input.strip(), session)
+        session.state = "IDLE"
+
+    return response
+
+async def respond(session_id: str, user_input: str) -> str:
+    if user_input.lower() in ["종료", "고마워"]:
+        await sessions.drop(session_id)
+        return "이용해주셔서 감사합니다. 건강하세요!"
+
+    session = sessions.get(session_id)
+    async with session.lock:
+        response = await run_turn(session, user_input)
+
+    logger.info(f"[LLM] ({session_id}) 입력: {user_input}")
+    logger.info(f"[LLM] ({session_id}) 응답: {response} (prompt {session.prompt_tokens} 토큰)")
+    return response
+
+# 메인 LLM API
+@app.post("/llm")
+async def generate(request: Request):
+    data = await request.json()
+    user_input = data.get("text", "").strip()
+    session_id = str(data.get("session_id") or "default")
+
+    response = await respond(session_id, user_input)
+    return JSONResponse({"text": response, "session_id": session_id})
+
+# 스트리밍 LLM API (SSE)
+# - token   : 디코딩되는 대로 {"text": 조각}
+# - sentence: 문장이 끝날 때마다 {"index": n, "text": 문장}  → 첫 문장부터 바로 TTS 가능
+# - done    : {"text": 전체 응답, "session_id": ...}
+# - error   : {"detail": ...}
+@app.post("/llm/stream")
+async def generate_stream(request: Request):
+    data = await request.json()
+    user_input = data.get("text", "").strip()
+    session_id = str(data.get("session_id") or "default")
+
+    events = asyncio.Queue()
+
+    async def produce():
+        stream_callback.set(lambda delta: events.put_nowait(("token", delta)))
+        try:
+            events.put_nowait(("done", await respond(session_id, user_input)))
+        except Exception as e:
+            logger.exception(f"[x] 스트리밍 응답 실패 ({session_id})")
+            events.put_nowait(("error", str(e)))
+
+    async def event_stream():
+        # 클라이언트가 끊어도 턴은 끝까지 진행해 세션 상태를 일관되게 유지
+        task = asyncio.create_task(produce())
+        splitter = SentenceSplitter()
+        streamed = ""
+        index = 0
+        while True:
+            kind, payload = await events.get()
+            if kind == "error":
+                yield sse("error", {"detail": payload})
+                break
+
+            if kind == "token":
+                chunk = payload
+                streamed += chunk
+            else:
+                # 고정 문구 응답이나 생성 뒤에 덧붙인 안내 문구처럼 스트리밍되지 않은 나머지
+                emitted = streamed.strip()
+                chunk = payload[len(emitted):] if payload.startswith(emitted) else ""
+            if chunk:
+                yield sse("token", {"text": chunk})
+
+            sentences = splitter.feed(chunk)
+            if kind == "done":
+                sentences += splitter.flush()
+            for sentence in sentences:
+                yield sse("sentence", {"index": index, "text": sentence})
+                index += 1
+
+            if kind == "done":
+                yield sse("done", {"text": payload, "session_id": session_id})
+                break
+        await task
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/stats")
+def stats():
+    return JSONResponse({
+        "sessions": sessions.stats(),
+        "yes_no": yes_no_classifier.stats(),
+        "scheduler": scheduler.stats(),
+        "history": history.stats(),
+        "directions": directions.stats(),
+        "reception": reception_store.stats(),
+        "triage": symptom_classifier.stats(),
+        "prefix_cache": prefix_cache.stats() if prefix_cache is not None else None,
+    })
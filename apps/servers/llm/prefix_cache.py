@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PrefixEntry:
+    name: str
+    input_ids: tuple
+    kv: tuple = None            # legacy KV ((k, v), ...) — 배치 축 크기 1
+    nbytes: int = 0
+    hits: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def chat_prefix_ids(tokenizer, encode, system_prompt):
+    """시스템 메시지까지의 prompt 토큰. 사용자 메시지만 다른 두 렌더링의 공통 앞부분이므로 어떤 요청에서도 똑같이 토큰화됩니다."""
+    rendered = [
+        encode(tokenizer.apply_chat_template(
+            [{"role": "system", "content": system_prompt}, {"role": "user", "content": probe}],
+            tokenize=False, add_generation_prompt=True))
+        for probe in ("가", "나")
+    ]
+    n = 0
+    while n < min(map(len, rendered)) and rendered[0][n] == rendered[1][n]:
+        n += 1
+    return rendered[0][:n]
+
+
+def kv_nbytes(kv):
+    return sum(k.numel() * k.element_size() + v.numel() * v.element_size() for k, v in kv)
+
+
+class PrefixCache:
+    """고정 시스템 프롬프트 prefix 의 past-key-values 를 보관합니다.
+
+    - 이름(name)별로 prefix 토큰을 등록하며, 같은 이름에 다른 토큰이 등록되면(프롬프트 변경) 기존 KV 는 버립니다.
+    - KV 합계가 max_bytes 를 넘으면 가장 오래 쓰지 않은 KV 부터 내려놓고, 다음 사용 때 다시 계산합니다.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, min_tokens=8):
+        self.max_bytes = int(max_bytes)
+        self.min_tokens = int(min_tokens)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.computed = 0
+        self.evicted = 0
+        self.replaced = 0
+        self.saved_tokens = 0
+
+    def register(self, name: str, input_ids):
+        input_ids = tuple(input_ids)
+        if len(input_ids) < self.min_tokens:
+            return False
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.input_ids == input_ids:
+                return False
+            if entry is not None:
+                self.replaced += 1
+            self._entries[name] = PrefixEntry(name=name, input_ids=input_ids)
+        return True
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def match(self, input_ids):
+        """input_ids 로 시작하는 가장 긴 등록 prefix 를 찾습니다 (뒤에 최소 1 토큰이 남아야 함)."""
+        best = None
+        with self._lock:
+            for entry in self._entries.values():
+                n = len(entry.input_ids)
+                if n < len(input_ids) and (best is None or n > len(best.input_ids)) \
+                        and tuple(input_ids[:n]) == entry.input_ids:
+                    best = entry
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_tokens += len(best.input_ids)
+                best.hits += 1
+                best.last_used = time.monotonic()
+        return best
+
+    def store(self, entry: PrefixEntry, kv):
+        with self._lock:
+            # 계산하는 동안 프롬프트가 바뀌었으면 버림
+            if self._entries.get(entry.name) is not entry:
+                return
+            nbytes = kv_nbytes(kv)
+            if nbytes > self.max_bytes:
+                # 혼자서도 한도를 넘는 prefix 는 매번 다시 계산하지 않도록 등록 해제
+                del self._entries[entry.name]
+                self.evicted += 1
+                return
+            entry.kv = kv
+            entry.nbytes = nbytes
+            self.computed += 1
+            self._evict(keep=entry)
+
+    def _evict(self, keep=None):
+        loaded = sorted((e for e in self._entries.values() if e.kv is not None and e is not keep),
+                        key=lambda e: e.last_used)
+        total = sum(e.nbytes for e in self._entries.values() if e.kv is not None)
+        for entry in loaded:
+            if total <= self.max_bytes:
+                break
+            total -= entry.nbytes
+            entry.kv, entry.nbytes = None, 0
+            self.evicted += 1
+
+    def pending(self):
+        with self._lock:
+            return [e for e in self._entries.values() if e.kv is None]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": {e.name: {"tokens": len(e.input_ids), "loaded": e.kv is not None, "hits": e.hits}
+                            for e in self._entries.values()},
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "computed": self.computed,
+                "evicted": self.evicted,
+                "replaced": self.replaced,
+                "saved_prefill_tokens": self.saved_tokens,
+            }
@@ -0,0 +1,182 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 전화번호를 한국어로 읽은 ASR 결과 ("공일공 일이삼사 ...") → 숫자
+SPOKEN_DIGITS = {
+    "공": "0", "영": "0", "빵": "0", "일": "1", "이": "2", "삼": "3", "사": "4",
+    "오": "5", "육": "6", "륙": "6", "칠": "7", "팔": "8", "구": "9",
+}
+NATIVE_DIGITS = {
+    "하나": "1", "둘": "2", "셋": "3", "넷": "4", "다섯": "5",
+    "여섯": "6", "일곱": "7", "여덟": "8", "아홉": "9",
+}
+NATIVE_PATTERN = re.compile("|".join(sorted(NATIVE_DIGITS, key=len, reverse=True)))
+# 단어 전체가 숫자/숫자 음절로만 이루어진 경우에만 숫자로 읽음 ("검사", "오세요" 의 사/오 는 무시)
+DIGIT_WORD = re.compile("(?:[0-9" + "".join(SPOKEN_DIGITS) + "]|" + NATIVE_PATTERN.pattern + ")+")
+# 숫자 뒤에 붙는 어미/조사 ("오육칠팔이요", "공일공에", "일이삼사번이에요")
+# '이' 로 시작하는 어미는 끝자리 '이'(2) 와 겹치므로 '이' 를 남기는 패턴도 따로 둠
+COPULA_ENDINGS = "에요|예요|고요|구요|요|고|야|랑|며|죠|다"
+WORD_ENDING = re.compile(rf"(?:번호?)?(?:이(?:{COPULA_ENDINGS})|입니다|{COPULA_ENDINGS}|으로|로|에|은|는|을|를)?$")
+WORD_ENDING_KEEP_I = re.compile(rf"(?:번호?)?(?:{COPULA_ENDINGS}|니다|으로|로|에|은|는|을|를)?$")
+NAME_SUFFIX = re.compile(r"(입니다|이에요|예요|이요|요|님)+$")
+
+
+def extract_digits(text: str, keep_final_i: bool = False) -> str:
+    """숫자와 한국어로 읽은 숫자만 골라 이어 붙입니다. ("공일공 1234 오륙칠팔이요" → "01012345678")
+
+    단어마다 어미/조사를 떼어 낸 뒤, 남은 단어 전체가 숫자 음절로 이어져 있을 때만 숫자로 바꿉니다.
+    keep_final_i 이면 "칠이요" 의 '이' 를 어미가 아닌 숫자 2 로 봅니다.
+    다른 단어에 섞인 아라비아 숫자는 그대로 씁니다.
+    """
+    ending = WORD_ENDING_KEEP_I if keep_final_i else WORD_ENDING
+    digits = []
+    for word in re.findall(r"[0-9가-힣]+", text):
+        word = ending.sub("", word, count=1)
+        if DIGIT_WORD.fullmatch(word):
+            word = NATIVE_PATTERN.sub(lambda m: NATIVE_DIGITS[m.group(0)], word)
+            digits.append("".join(SPOKEN_DIGITS.get(ch, ch) for ch in word))
+        else:
+            digits.append(re.sub(r"[^0-9]", "", word))
+    return "".join(digits)
+
+
+def plausible_phone(digits: str) -> bool:
+    return len(digits) == 11 if digits.startswith("01") else 9 <= len(digits) <= 11
+
+
+def normalize_phone(text: str) -> str:
+    candidates = []
+    # "…칠이요" 처럼 끝자리 '이'(2) 와 어미가 겹치면 떼어 낸 쪽과 남긴 쪽 중 전화번호 길이가 맞는 쪽을 씀
+    for keep_final_i in (False, True):
+        digits = extract_digits(text, keep_final_i)
+        # +82 10 ... → 010 ...
+        if digits.startswith("82") and len(digits) in (11, 12):
+            digits = "0" + digits[2:]
+        candidates.append(digits)
+    return next((d for d in candidates if plausible_phone(d)), candidates[0])
+
+
+def normalize_name(text: str) -> str:
+    name = "".join(re.findall(r"[가-힣a-zA-Z]+", text)).lower()
+    return NAME_SUFFIX.sub("", name) or name
+
+
+# 실행 위치와 상관없이 같은 파일을 쓰도록 모듈 옆에 둠
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reception.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    phone_key TEXT NOT NULL,
+    dept TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_receptions_phone_name ON receptions (phone_key, name_key, id);
+"""
+
+
+class ReceptionStore:
+    """접수 내역 저장소 (SQLite WAL).
+
+    - (정규화된 전화번호, 이름) 인덱스로 조회하므로 O(log n) 이고, 같은 파일을 쓰는 여러 프로세스(LLM 레플리카)가 공유합니다.
+    - 조회 결과는 프로세스 안에서 cache_ttl_s 동안 캐시합니다 (다른 프로세스의 새 접수는 없을 때만 DB 를 다시 봄).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, cache_size=4096, cache_ttl_s=30.0):
+        self.path = path
+        self.cache_size = cache_size
+        self.cache_ttl_s = cache_ttl_s
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, name: str, phone: str, dept: str, date: str, time_: str):
+        self.bulk_add([(name, phone, dept, date, time_)])
+
+    def bulk_add(self, rows):
+        now = time.time()
+        records = [(name, normalize_name(name), phone, normalize_phone(phone), dept, date, time_, now)
+                   for name, phone, dept, date, time_ in rows]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO receptions (name, name_key, phone, phone_key, dept, date, time, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+        with self._lock:
+            for record in records:
+                self._cache.pop((record[1], record[3]), None)
+            self.writes += len(records)
+
+    def lookup(self, name: str, phone: str):
+        """가장 최근 접수 내역 {"name", "phone", "dept", "date", "time"} 또는 None"""
+        key = (normalize_name(name), normalize_phone(phone))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[0] <= self.cache_ttl_s:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        row = self._connect().execute(
+            "SELECT name, phone, dept, date, time FROM receptions "
+            "WHERE phone_key = ? AND name_key = ? ORDER BY id DESC LIMIT 1", (key[1], key[0])).fetchone()
+        if row is None:
+            return None
+
+        info = dict(row)
+        with self._lock:
+            self._cache[key] = (now, info)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return info
+
+    def count(self):
+        # 삭제하지 않는 AUTOINCREMENT 테이블이라 MAX(id) 가 행 수 (COUNT(*) 는 전체 스캔)
+        # 다른 프로세스가 쓴 행도 반영되도록 메모리 카운터 대신 DB 에서 읽음
+        return self._connect().execute("SELECT MAX(id) FROM receptions").fetchone()[0] or 0
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "rows": self.count(),
+            "cache_entries": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "writes": self.writes,
+        }
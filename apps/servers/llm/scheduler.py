@@ -0,0 +1,460 @@
+import asyncio
+import logging
+import queue
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+import torch
+from transformers import DynamicCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GenerationRequest:
+    input_ids: list
+    max_new_tokens: int = 128
+    do_sample: bool = False
+    temperature: float = 1.0
+    top_p: float = 1.0
+    repetition_penalty: float = 1.0
+    eos_token_ids: frozenset = frozenset()
+
+    loop: asyncio.AbstractEventLoop = None
+    future: asyncio.Future = None
+    on_text: object = None
+    streamed: str = ""
+    # 제약 생성: labels 트라이(현재 노드) / 정지 패턴 / 통계용 모드 이름
+    node: dict = None
+    stop: re.Pattern = None
+    stop_text: str = None
+    mode: str = "free"
+    done: bool = False
+    generated: list = field(default_factory=list)
+    seen: set = field(default_factory=set)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+    def append(self, token: int):
+        self.generated.append(token)
+        self.seen.add(token)
+
+    @property
+    def finished(self):
+        if not self.generated:
+            return False
+        return self.done or len(self.generated) >= self.max_new_tokens or self.generated[-1] in self.eos_token_ids
+
+
+def build_label_trie(tokenizer, labels):
+    """허용 라벨의 토큰 시퀀스 트라이. 앞 공백 유무에 따라 토큰화가 달라지므로 두 경우를 모두 넣습니다.
+    None 키는 라벨이 끝나는 노드 표시입니다."""
+    root = {}
+    for label in labels:
+        for variant in (label, " " + label):
+            node = root
+            for token in tokenizer(variant, add_special_tokens=False).input_ids:
+                node = node.setdefault(token, {})
+            node[None] = label
+    return root
+
+
+def _resolve(future, result=None, error=None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _pad_left(cache, pad):
+    # legacy KV 캐시 ((k, v), ...) 의 시퀀스 축 왼쪽에 0 을 채움 (해당 위치는 attention mask 로 가려짐)
+    if pad == 0:
+        return cache
+    padded = []
+    for k, v in cache:
+        zk = k.new_zeros(k.shape[0], k.shape[1], pad, k.shape[3])
+        zv = v.new_zeros(v.shape[0], v.shape[1], pad, v.shape[3])
+        padded.append((torch.cat([zk, k], dim=2), torch.cat([zv, v], dim=2)))
+    return tuple(padded)
+
+
+class GenerationScheduler:
+    """여러 요청의 생성을 하나의 동적 배치로 묶어 디코딩 스텝 단위로 진행합니다 (continuous batching).
+
+    - 새 요청은 스텝 사이에 prefill 되어 진행 중인 배치에 합류합니다 (왼쪽 패딩 + attention mask).
+    - 요청마다 max_new_tokens / 샘플링 설정이 다르며, 끝난 시퀀스는 곧바로 배치에서 빠집니다.
+    - 모델은 전용 워커 스레드 하나에서만 호출되므로 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size=8, max_wait_ms=5.0, prefix_cache=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = model.device
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.prefix_cache = prefix_cache
+
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        default_eos = model.generation_config.eos_token_id
+        if default_eos is None:
+            default_eos = tokenizer.eos_token_id
+        self.default_eos = frozenset(default_eos if isinstance(default_eos, (list, tuple)) else [default_eos])
+
+        self._tries = {}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+
+        # 지표
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.decode_steps = 0
+        self.occupied_slots = 0
+        self.generated_tokens = 0
+        self.max_active = 0
+        self.active = 0
+        self.modes = defaultdict(Counter)
+
+    # ---------------------------------------------------------------- API
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+            self._thread.start()
+
+    def prime_prefixes(self):
+        """등록된 prefix 의 KV 를 미리 계산합니다. 워커가 이미 돌고 있으면 첫 사용 때 워커에서 계산됩니다."""
+        if self.prefix_cache is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        with torch.inference_mode():
+            for entry in self.prefix_cache.pending():
+                self._compute_prefix(entry)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def encode(self, prompt: str) -> list:
+        ids = self.tokenizer(prompt, add_special_tokens=False).input_ids
+        bos = self.tokenizer.bos_token_id
+        # chat template 은 이미 BOS 를 포함하므로 없을 때만 붙임
+        if bos is not None and (not ids or ids[0] != bos):
+            ids = [bos] + ids
+        return ids
+
+    async def generate(self, prompt: str, max_new_tokens=128, do_sample=False, temperature=1.0, top_p=1.0,
+                       repetition_penalty=1.0, eos_token_id=None, on_text=None, labels=None, stop=None,
+                       mode=None) -> str:
+        """생성된 텍스트를 돌려줍니다. prompt 는 문자열 또는 이미 인코딩된 토큰 리스트입니다.
+        on_text 가 주어지면 디코딩되는 대로 새로 늘어난 텍스트 조각을 이벤트 루프에서 호출합니다.
+
+        - labels: 출력을 라벨 목록 중 하나로 제한하고 라벨이 완성되면 바로 멈춥니다 (greedy).
+        - stop: 정규식. 생성된 텍스트에서 처음 일치하는 곳까지만 생성하고 돌려줍니다.
+        - mode: /stats 에 호출당 디코딩 토큰 수를 모을 이름
+        """
+        self.start()
+        if eos_token_id is None:
+            eos = self.default_eos
+        else:
+            eos = self.default_eos | frozenset(eos_token_id if isinstance(eos_token_id, (list, tuple)) else [eos_token_id])
+
+        loop = asyncio.get_running_loop()
+        request = GenerationRequest(
+            input_ids=list(prompt) if isinstance(prompt, (list, tuple)) else self.encode(prompt),
+            max_new_tokens=max(1, int(max_new_tokens)),
+            do_sample=do_sample and temperature > 0 and not labels,
+            temperature=float(temperature),
+            top_p=float(top_p),
+            repetition_penalty=float(repetition_penalty),
+            eos_token_ids=eos,
+            loop=loop,
+            future=loop.create_future(),
+            on_text=on_text,
+            node=self._label_trie(labels) if labels else None,
+            stop=re.compile(stop) if isinstance(stop, str) else stop,
+            mode=mode or ("labels" if labels else "stop" if stop else "free"),
+        )
+        request.seen.update(request.input_ids)
+        self.submitted += 1
+        self._queue.put(request)
+
+        tokens = await request.future
+        if request.stop_text is not None:
+            return request.stop_text
+        return self.tokenizer.decode(tokens, skip_special_tokens=True)
+
+    def _label_trie(self, labels):
+        key = tuple(labels)
+        if key not in self._tries:
+            self._tries[key] = build_label_trie(self.tokenizer, labels)
+        return self._tries[key]
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "active": self.active,
+            "max_batch_size": self.max_batch_size,
+            "max_active": self.max_active,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "decode_steps": self.decode_steps,
+            "generated_tokens": self.generated_tokens,
+            "batch_occupancy": round(self.occupied_slots / (self.decode_steps * self.max_batch_size), 3)
+            if self.decode_steps else 0.0,
+            "avg_active": round(self.occupied_slots / self.decode_steps, 3) if self.decode_steps else 0.0,
+            # 모드별 호출당 디코딩 토큰 수
+            "modes": {
+                name: {"calls": c["calls"], "tokens": c["tokens"], "last_tokens": c["last_tokens"],
+                       "avg_tokens": round(c["tokens"] / c["calls"], 2) if c["calls"] else 0.0}
+                for name, c in list(self.modes.items())
+            },
+        }
+
+    # ------------------------------------------------------------- worker
+
+    def _take(self, free_slots, block):
+        taken = []
+        if free_slots <= 0:
+            return taken
+        if block:
+            try:
+                taken.append(self._queue.get(timeout=0.1))
+            except queue.Empty:
+                return taken
+            # 첫 요청이 오면 잠깐 기다려 함께 prefill 할 요청을 모음
+            deadline = time.monotonic() + self.max_wait
+            while len(taken) < free_slots:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    taken.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+        while len(taken) < free_slots:
+            try:
+                taken.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # 이미 취소된 요청(클라이언트 연결 종료 등)은 건너뜀
+        return [r for r in taken if not r.future.cancelled()]
+
+    def _run(self):
+        active, cache, mask, pending = [], None, None, None
+        with torch.inference_mode():
+            while not self._stop.is_set():
+                newcomers = self._take(self.max_batch_size - len(active), block=not active)
+                if newcomers:
+                    try:
+                        newcomers, new_cache, new_mask, new_pending = self._prefill(newcomers)
+                        active, cache, mask, pending = self._merge(
+                            active, cache, mask, pending, newcomers, new_cache, new_mask, new_pending)
+                    except Exception as e:
+                        logger.exception("[x] prefill 실패")
+                        self._fail(newcomers, e)
+
+                if not active:
+                    continue
+
+                try:
+                    active, cache, mask, pending = self._retire(active, cache, mask, pending)
+                    if active:
+                        cache, mask, pending = self._decode_step(active, cache, mask, pending)
+                        active, cache, mask, pending = self._retire(active, cache, mask, pending)
+                except Exception as e:
+                    logger.exception("[x] 디코딩 스텝 실패")
+                    self._fail(active, e)
+                    active, cache, mask, pending = [], None, None, None
+                self.active = len(active)
+
+    def _forward(self, input_ids, attention_mask, position_ids, cache=None):
+        out = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache,
+            use_cache=True,
+        )
+        return out.logits[:, -1, :], out.past_key_values
+
+    def _prefill(self, requests):
+        # 같은 prefix(시스템 프롬프트)를 공유하는 요청끼리 묶어 prefix 뒤의 토큰만 prefill
+        groups = {}
+        for r in requests:
+            entry = self.prefix_cache.match(r.input_ids) if self.prefix_cache is not None else None
+            if entry is not None and entry.kv is None:
+                self._compute_prefix(entry)
+            if entry is not None and entry.kv is None:
+                entry = None
+            groups.setdefault(None if entry is None else entry.name, (entry, []))[1].append(r)
+
+        ordered, cache, mask, pending = [], None, None, None
+        for entry, group in groups.values():
+            group_cache, group_mask, group_pending = self._prefill_group(group, entry)
+            ordered, cache, mask, pending = self._merge(
+                ordered, cache, mask, pending, group, group_cache, group_mask, group_pending)
+        return ordered, cache, mask, pending
+
+    def _prefill_group(self, requests, entry=None):
+        skip = len(entry.input_ids) if entry is not None else 0
+        suffixes = [r.input_ids[skip:] for r in requests]
+        length = max(len(ids) for ids in suffixes)
+        input_ids = torch.full((len(requests), length), self.pad_token_id, dtype=torch.long)
+        mask = torch.zeros((len(requests), skip + length), dtype=torch.long)
+        mask[:, :skip] = 1
+        for i, ids in enumerate(suffixes):
+            n = len(ids)
+            input_ids[i, length - n:] = torch.tensor(ids, dtype=torch.long)
+            mask[i, skip + length - n:] = 1
+        input_ids = input_ids.to(self.device)
+        mask = mask.to(self.device)
+        position_ids = (mask.cumsum(-1) - 1).clamp(min=0)[:, skip:]
+
+        if entry is None:
+            cache = DynamicCache()
+        else:
+            # prefix KV 는 공유 텐서이므로 배치 축으로 expand 만 함 (update 는 torch.cat 으로 새 텐서를 만듦)
+            b = len(requests)
+            cache = DynamicCache.from_legacy_cache(tuple(
+                (k.expand(b, -1, -1, -1), v.expand(b, -1, -1, -1)) for k, v in entry.kv))
+        logits, cache = self._forward(input_ids, mask, position_ids, cache)
+        tokens = self._sample(requests, logits)
+        return cache, mask, tokens
+
+    def _compute_prefix(self, entry):
+        input_ids = torch.tensor([entry.input_ids], dtype=torch.long, device=self.device)
+        out = self.model(input_ids=input_ids, past_key_values=DynamicCache(), use_cache=True)
+        self.prefix_cache.store(entry, out.past_key_values.to_legacy_cache())
+
+    def _decode_step(self, active, cache, mask, pending):
+        position_ids = mask.sum(-1, keepdim=True)
+        mask = torch.cat([mask, mask.new_ones(mask.shape[0], 1)], dim=1)
+        logits, cache = self._forward(pending[:, None], mask, position_ids, cache)
+        tokens = self._sample(active, logits)
+
+        self.decode_steps += 1
+        self.occupied_slots += len(active)
+        self.max_active = max(self.max_active, len(active))
+        return cache, mask, tokens
+
+    def _sample(self, requests, logits):
+        logits = logits.float()
+        tokens = []
+        for i, r in enumerate(requests):
+            row = logits[i]
+            if r.repetition_penalty != 1.0 and r.seen:
+                seen = torch.tensor(list(r.seen), device=row.device)
+                score = row[seen]
+                row = row.clone()
+                row[seen] = torch.where(score < 0, score * r.repetition_penalty, score / r.repetition_penalty)
+
+            if r.node is not None:
+                # 라벨 트라이에서 다음에 올 수 있는 토큰만 남김
+                # 한 라벨이 다른 라벨의 앞부분이면 그 자리에서 EOS 로 끝낼 수도 있음
+                allowed = [t for t in r.node if t is not None] + (list(r.eos_token_ids) if None in r.node else [])
+                allowed = torch.tensor(allowed, device=row.device)
+                masked = torch.full_like(row, float("-inf"))
+                masked[allowed] = row[allowed]
+                row = masked
+
+            if not r.do_sample:
+                token = int(row.argmax())
+            else:
+                row = row / r.temperature
+                if r.top_p < 1.0:
+                    sorted_logits, sorted_idx = torch.sort(row, descending=True)
+                    probs = torch.softmax(sorted_logits, dim=-1)
+                    remove = probs.cumsum(-1) - probs > r.top_p
+                    sorted_logits[remove] = float("-inf")
+                    row = torch.full_like(row, float("-inf")).scatter(0, sorted_idx, sorted_logits)
+                token = int(torch.multinomial(torch.softmax(row, dim=-1), 1))
+
+            r.append(token)
+            self.generated_tokens += 1
+            tokens.append(token)
+            if r.node is not None and token not in r.eos_token_ids:
+                r.node = r.node[token]
+                # 더 이어질 토큰이 없으면 라벨 완성
+                r.done = all(t is None for t in r.node)
+            if r.on_text is not None or r.stop is not None:
+                self._observe(r)
+        return torch.tensor(tokens, dtype=torch.long, device=self.device)
+
+    def _observe(self, r):
+        tokens = r.generated[:-1] if r.generated[-1] in r.eos_token_ids else r.generated
+        text = self.tokenizer.decode(tokens, skip_special_tokens=True)
+        if r.stop is not None:
+            match = r.stop.search(text)
+            if match is not None:
+                text = text[:match.end()]
+                r.stop_text = text
+                r.done = True
+        if r.on_text is None:
+            return
+        # 한글처럼 여러 토큰에 걸친 글자는 완성될 때까지 기다림
+        if text.endswith("\ufffd") or len(text) <= len(r.streamed):
+            return
+        delta = text[len(r.streamed):]
+        r.streamed = text
+        r.loop.call_soon_threadsafe(r.on_text, delta)
+
+    def _merge(self, active, cache, mask, pending, newcomers, new_cache, new_mask, new_pending):
+        if not active:
+            return list(newcomers), new_cache, new_mask, new_pending
+
+        old, new = cache.to_legacy_cache(), new_cache.to_legacy_cache()
+        length = max(mask.shape[1], new_mask.shape[1])
+        old = _pad_left(old, length - mask.shape[1])
+        new = _pad_left(new, length - new_mask.shape[1])
+        mask = torch.cat([mask.new_zeros(mask.shape[0], length - mask.shape[1]), mask], dim=1)
+        new_mask = torch.cat([new_mask.new_zeros(new_mask.shape[0], length - new_mask.shape[1]), new_mask], dim=1)
+
+        merged = tuple((torch.cat([ok, nk]), torch.cat([ov, nv])) for (ok, ov), (nk, nv) in zip(old, new))
+        return (active + list(newcomers), DynamicCache.from_legacy_cache(merged),
+                torch.cat([mask, new_mask]), torch.cat([pending, new_pending]))
+
+    def _retire(self, active, cache, mask, pending):
+        keep = []
+        for i, r in enumerate(active):
+            if r.finished or r.future.cancelled():
+                tokens = r.generated[:-1] if r.generated and r.generated[-1] in r.eos_token_ids else r.generated
+                stats = self.modes[r.mode]
+                stats["calls"] += 1
+                stats["tokens"] += len(r.generated)
+                stats["last_tokens"] = len(r.generated)
+                self.completed += 1
+                r.loop.call_soon_threadsafe(_resolve, r.future, tokens)
+            else:
+                keep.append(i)
+
+        if len(keep) == len(active):
+            return active, cache, mask, pending
+        if not keep:
+            return [], None, None, None
+
+        idx = torch.tensor(keep, device=mask.device)
+        mask = mask.index_select(0, idx)
+        # 남은 시퀀스 모두에게 패딩인 앞쪽 열은 잘라 냄
+        start = int(mask.any(0).nonzero()[0])
+        mask = mask[:, start:]
+        legacy = tuple((k.index_select(0, idx)[:, :, start:], v.index_select(0, idx)[:, :, start:])
+                       for k, v in cache.to_legacy_cache())
+        return ([active[i] for i in keep], DynamicCache.from_legacy_cache(legacy), mask,
+                pending.index_select(0, idx))
+
+    def _fail(self, requests, error):
+        for r in requests:
+            self.failed += 1
+            r.loop.call_soon_threadsafe(_resolve, r.future, None, error)
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(slots=True)
+class DialogSession:
+    """키오스크 한 대의 대화 상태"""
+    session_id: str
+    state: str = "IDLE"
+    sub_state: Optional[str] = None
+    retry_count: int = 0
+
+    user_name: str = ""
+    user_phone: str = ""
+    user_address: str = ""
+    user_symptom: str = ""
+    lookup_name: str = ""
+    lookup_phone: str = ""
+    predicted_dept: str = ""
+
+    messages_triage_step1: list = field(default_factory=list)
+    messages_triage_step2: list = field(default_factory=list)
+    # 마지막 생성 요청의 prompt 토큰 수 (history 윈도우가 prefill 비용을 일정하게 유지하는지 확인용)
+    prompt_tokens: int = 0
+
+    last_active: float = field(default_factory=time.monotonic)
+    # 같은 키오스크에서 동시에 들어온 요청이 상태를 꼬지 않도록 턴 단위로 직렬화
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionStore:
+    """세션 ID → DialogSession. 유휴 시간(idle_timeout_s)이 지나거나 max_sessions 를 넘으면 오래된 순으로 제거합니다.
+
+    턴을 처리 중인(lock 을 잡은) 세션은 제거하지 않습니다. 그 턴이 떨어져 나간 세션에 상태를 쓰고
+    다음 요청이 접수 도중에 새 대화로 시작되는 것을 막기 위해서입니다.
+    """
+
+    def __init__(self, factory, max_sessions=64, idle_timeout_s=900.0):
+        self.factory = factory
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout_s = float(idle_timeout_s)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session_id: str) -> DialogSession:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self.factory(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+                self._evict_lru()
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = now
+            return session
+
+    async def drop(self, session_id: str):
+        """진행 중인 턴이 있으면 끝날 때까지 기다렸다가 제거합니다."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return
+        async with session.lock:
+            with self._lock:
+                if self._sessions.get(session_id) is session:
+                    del self._sessions[session_id]
+
+    def _evict_lru(self):
+        # 처리 중인 세션은 건너뛰고 가장 오래 안 쓴 것부터 (모두 처리 중이면 잠시 max_sessions 를 넘김)
+        excess = len(self._sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        for session_id in [sid for sid, s in self._sessions.items() if not s.lock.locked()][:excess]:
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def _expire(self, now):
+        # OrderedDict 는 최근 사용 순이므로 앞에서부터 만료된 것만 보고, 처리 중인 세션은 남김
+        expired = []
+        for session_id, session in self._sessions.items():
+            if now - session.last_active <= self.idle_timeout_s:
+                break
+            if not session.lock.locked():
+                expired.append(session_id)
+        for session_id in expired:
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_timeout_s": self.idle_timeout_s,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,35 @@
+import json
+import re
+
+# 문장 끝 문장부호 뒤에 공백이 오거나 줄바꿈이 나오면 한 문장으로 봅니다.
+# 문장부호가 버퍼 끝에 있으면 다음 글자(숫자 "3.5" 등)를 볼 때까지 기다립니다.
+SENTENCE_END = re.compile(r"[.!?…。]+[\"'”’)\]]*(?=\s)|\n+")
+
+
+class SentenceSplitter:
+    """토큰 단위로 들어오는 텍스트를 완성된 문장 단위로 잘라 냅니다."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str):
+        self.buffer += text
+        sentences = []
+        while True:
+            match = SENTENCE_END.search(self.buffer)
+            if match is None:
+                break
+            sentence = self.buffer[:match.end()].strip()
+            self.buffer = self.buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self):
+        sentence = self.buffer.strip()
+        self.buffer = ""
+        return [sentence] if sentence else []
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
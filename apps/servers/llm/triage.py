@@ -0,0 +1,97 @@
+import json
+import math
+import re
+import threading
+from collections import Counter
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"[가-힣a-zA-Z0-9]+", text.lower()))
+
+
+def char_ngrams(text: str, n=2):
+    # 띄어쓰기가 ASR 마다 달라지므로 공백을 빼고 글자 n-gram 으로 비교
+    compact = text.replace(" ", "")
+    if len(compact) < n:
+        return [compact] if compact else []
+    return [compact[i:i + n] for i in range(len(compact) - n + 1)]
+
+
+def load_departments(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["departments"]
+
+
+class SymptomClassifier:
+    """증상 → 진료과 분류기 (키워드 + 글자 bigram TF-IDF 최근접).
+
+    진료과마다 키워드와 예시 문장으로 TF-IDF 벡터를 만들고, 질의와의 코사인 유사도에
+    키워드(어절 앞부분 일치) 점수를 더한 뒤 softmax 로 확신도(confidence)를 계산합니다.
+    """
+
+    def __init__(self, departments, temperature=8.0):
+        self.names = [d["name"] for d in departments]
+        self.keywords = [[normalize(k) for k in d.get("keywords", [])] for d in departments]
+        self.temperature = float(temperature)
+
+        docs = []
+        for d in departments:
+            grams = []
+            for text in d.get("keywords", []) + d.get("examples", []):
+                grams += char_ngrams(normalize(text))
+            docs.append(Counter(grams))
+        df = Counter(g for doc in docs for g in doc)
+        self.idf = {g: math.log((1 + len(docs)) / (1 + c)) + 1.0 for g, c in df.items()}
+        self.vectors = [self._weigh(doc) for doc in docs]
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.confident = 0
+
+    def _weigh(self, counts):
+        vec = {g: c * self.idf[g] for g, c in counts.items() if g in self.idf}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {g: v / norm for g, v in vec.items()}
+
+    def scores(self, text: str):
+        query = normalize(text)
+        qvec = self._weigh(Counter(char_ngrams(query)))
+        spaced = " " + query
+        out = []
+        for name, vec, keywords in zip(self.names, self.vectors, self.keywords):
+            cosine = sum(w * vec.get(g, 0.0) for g, w in qvec.items())
+            # 키워드가 어절 앞부분에 나오면 가산 ("아이가" 안의 "이가" 는 치과로 보지 않음)
+            hits = sum(1 for k in keywords if " " + k in spaced)
+            out.append((name, cosine + min(hits, 2) * 0.5))
+        return out
+
+    def classify(self, text: str):
+        """(진료과, confidence 0~1) 를 돌려줍니다."""
+        scored = self.scores(text)
+        top = max(s for _, s in scored)
+        exps = [math.exp((s - top) * self.temperature) for _, s in scored]
+        total = sum(exps)
+        best = max(range(len(scored)), key=lambda i: scored[i][1])
+        dept = scored[best][0]
+        confidence = exps[best] / total if top > 0 else 0.0
+        with self._lock:
+            self.calls += 1
+        return dept, round(confidence, 3)
+
+    def find_department(self, text: str):
+        """LLM 응답에서 가장 먼저 나오는 진료과 이름 (같은 위치면 긴 이름 우선, "신경외과" > "외과")"""
+        found = [(text.find(name), -len(name), name) for name in self.names if name in text]
+        return min(found)[2] if found else None
+
+    def record(self, confident: bool):
+        with self._lock:
+            self.confident += int(confident)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "departments": len(self.names),
+                "calls": self.calls,
+                "confident": self.confident,
+                "llm_fallback": self.calls - self.confident,
+            }
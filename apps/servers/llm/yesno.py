@@ -0,0 +1,127 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+
+YES = "긍정"
+NO = "부정"
+UNKNOWN = "모르겠음"
+
+# 확인 단계에서 자주 나오는 짧은 대답 사전 (ASR 결과 기준, 띄어쓰기/문장부호 제거 후 비교)
+YES_WORDS = {
+    "네", "넵", "넹", "네네", "예", "옙", "응", "그래", "그래요", "그럼", "그럼요",
+    "맞아", "맞아요", "맞습니다", "맞네", "맞네요", "맞음", "맞지", "맞죠", "맞고요",
+    "좋아", "좋아요", "좋습니다", "오케이", "ok", "okay", "yes", "yeah",
+    "알겠어", "알겠어요", "알겠습니다", "해줘", "해줘요", "해주세요", "부탁해", "부탁해요",
+    "부탁드려요", "부탁드립니다", "그렇습니다", "그렇죠", "그래주세요", "진행해", "진행해주세요",
+    "접수해", "접수해줘", "접수해주세요", "물론", "물론이죠", "당연하지", "당연하죠",
+}
+# 감탄사로도 쓰여서 단독으로, 물음표 없이 대답했을 때만 긍정으로 보는 말 ("어?" 는 되물음)
+YES_ALONE = {"어", "엉", "웅"}
+YES_PREFIXES = ("맞습", "맞아", "좋아", "좋습", "부탁", "해주", "그렇습")
+
+NO_WORDS = {
+    "아니", "아니요", "아니오", "아뇨", "아녜요", "아니에요", "아닙니다", "아니야", "아님",
+    "싫어", "싫어요", "싫습니다", "틀려", "틀려요", "틀렸어", "틀렸어요", "틀렸습니다",
+    "잘못", "잘못됐어요", "됐어", "됐어요", "됐습니다", "no", "nope", "취소", "취소해주세요",
+}
+NO_PREFIXES = ("아니", "아뇨", "아녜", "싫", "틀리", "틀렸", "틀려", "잘못", "취소")
+
+# "안 맞아요", "맞지 않아요" 처럼 긍정 단어를 뒤집는 부정어
+NEGATORS = {"안", "못"}
+NEGATOR_PREFIXES = ("않", "안돼", "안되", "안해", "안할", "못해")
+# "하지 마세요", "해주지 마", "필요 없어요" 처럼 거절하는 말 (띄어쓰기를 없앤 문장에서 찾음)
+# 긍정 단어가 있어도 부정으로 봅니다.
+REFUSALS = ("마세요", "말아요", "말아주세요", "말고", "하지마", "지마", "필요없")
+
+UNKNOWN_PREFIXES = ("모르", "몰라", "글쎄", "잘모르")
+
+MAX_RULE_TOKENS = 6
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"[가-힣a-zA-Z0-9]+", text.lower()))
+
+
+def _match(token, words, prefixes):
+    return token in words or token.startswith(prefixes)
+
+
+def rule_classify(text: str):
+    """사전 기반 판정. 확실하면 YES/NO/UNKNOWN, 애매하면 None 을 돌려줍니다."""
+    tokens = normalize(text).split()
+    if not tokens or len(tokens) > MAX_RULE_TOKENS:
+        return None
+
+    compact = "".join(tokens)
+    if compact in YES_WORDS or (compact in YES_ALONE and "?" not in text):
+        return YES
+    if compact in NO_WORDS:
+        return NO
+
+    has_yes = any(_match(t, YES_WORDS, YES_PREFIXES) for t in tokens)
+    has_no = any(_match(t, NO_WORDS, NO_PREFIXES) for t in tokens)
+    has_negator = any(t in NEGATORS or t.startswith(NEGATOR_PREFIXES) for t in tokens)
+    has_unknown = compact.startswith(UNKNOWN_PREFIXES) or any(t.startswith(UNKNOWN_PREFIXES) for t in tokens)
+    has_refusal = any(r in compact for r in REFUSALS) or tokens[-1] == "마"
+
+    # "네 모르겠어요" 처럼 섞인 대답으로 이름/전화번호를 확정하지 않음
+    if has_unknown:
+        return UNKNOWN if not (has_yes or has_no) else None
+    if has_refusal:
+        return NO
+    if has_no and not has_yes:
+        return NO
+    if has_yes and not has_no:
+        return NO if has_negator else YES
+    return None
+
+
+def parse_judgment(output: str) -> str:
+    # LLM 출력에서 라벨만 추출 (기존 분기와 같이 긍정을 먼저 확인)
+    if YES in output:
+        return YES
+    if NO in output:
+        return NO
+    return UNKNOWN
+
+
+class YesNoClassifier:
+    """1단계 사전 매칭 → 2단계 이전 LLM 판정 캐시 → 3단계 LLM 순으로 긍정/부정을 판정합니다."""
+
+    def __init__(self, llm_classify, cache_size=1024):
+        self.llm_classify = llm_classify
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.tiers = Counter()
+
+    async def classify(self, text: str) -> str:
+        label = rule_classify(text)
+        if label is not None:
+            self.tiers["rule"] += 1
+            return label
+
+        key = normalize(text)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.tiers["cache"] += 1
+                return self._cache[key]
+
+        label = parse_judgment(await self.llm_classify(text))
+        self.tiers["llm"] += 1
+        with self._lock:
+            self._cache[key] = label
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return label
+
+    def stats(self):
+        total = sum(self.tiers.values())
+        return {
+            "rule": self.tiers["rule"],
+            "cache": self.tiers["cache"],
+            "llm": self.tiers["llm"],
+            "llm_ratio": round(self.tiers["llm"] / total, 3) if total else 0.0,
+            "cache_entries": len(self._cache),
+        }
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class AudioStore:
+    """최근 합성한 음성을 파일 대신 메모리에 잠시 보관합니다 (/audio/{filename} 재요청용).
+
+    ttl_s 가 지났거나 전체 크기가 max_bytes 를 넘으면 오래된 것부터 버립니다.
+    """
+
+    def __init__(self, ttl_s=600.0, max_bytes=64 * 1024 * 1024):
+        self.ttl_s = float(ttl_s)
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()  # filename → (저장 시각, 바이트)
+        self.total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, filename, data: bytes):
+        with self._lock:
+            old = self._entries.pop(filename, None)
+            if old is not None:
+                self.total -= len(old[1])
+            self._entries[filename] = (time.monotonic(), data)
+            self.total += len(data)
+            self._evict(time.monotonic())
+
+    def get(self, filename):
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._entries.get(filename)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def _evict(self, now):
+        while self._entries:
+            stored_at, data = next(iter(self._entries.values()))
+            if now - stored_at <= self.ttl_s and self.total <= self.max_bytes:
+                break
+            self._entries.popitem(last=False)
+            self.total -= len(data)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "mb": round(self.total / 1e6, 1),
+                "max_mb": round(self.max_bytes / 1e6, 1),
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,55 @@
+"""TTS 전송 형식 비교 (WAV vs Opus vs MP3)
+
+합성해 둔 WAV 파일을 encode.py 와 같은 설정으로 Opus / MP3 로 인코딩해 보고
+파일 크기, WAV 대비 비율, 인코딩 시간을 출력합니다. 파일을 주지 않으면 TTS_CACHE_DIR 의 *.wav 를 씁니다.
+
+사용법:
+    python bench_encode.py                          # /tmp/melotts_cache/*.wav
+    python bench_encode.py a.wav b.wav --opus-bitrate 16k --mp3-bitrate 32k
+"""
+import argparse
+import glob
+import os
+import time
+
+from encode import encode
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--opus-bitrate", default=os.getenv("TTS_OPUS_BITRATE", "24k"))
+    parser.add_argument("--mp3-bitrate", default=os.getenv("TTS_MP3_BITRATE", "48k"))
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.getenv("TTS_CACHE_DIR", "/tmp/melotts_cache"), "*.wav")))
+    if not files:
+        print("WAV 파일이 없습니다.")
+        return
+    bitrates = {"opus": args.opus_bitrate, "mp3": args.mp3_bitrate}
+
+    totals = {"wav": 0, "opus": 0, "mp3": 0}
+    times = {"opus": 0.0, "mp3": 0.0}
+    print(f"{'file':<24} {'wav KB':>8} {'opus KB':>8} {'ratio':>6} {'ms':>5} {'mp3 KB':>8} {'ratio':>6} {'ms':>5}")
+    for path in files:
+        with open(path, "rb") as f:
+            wav = f.read()
+        totals["wav"] += len(wav)
+        row = f"{os.path.basename(path)[:24]:<24} {len(wav) / 1024:8.1f}"
+        for fmt, bitrate in bitrates.items():
+            start = time.perf_counter()
+            data = encode(wav, fmt, bitrate)
+            elapsed = time.perf_counter() - start
+            totals[fmt] += len(data)
+            times[fmt] += elapsed
+            row += f" {len(data) / 1024:8.1f} {len(data) / len(wav):6.3f} {elapsed * 1000:5.0f}"
+        print(row)
+
+    print(f"\n파일 {len(files)}개, WAV 합계 {totals['wav'] / 1e6:.2f}MB")
+    for fmt, bitrate in bitrates.items():
+        print(f"{fmt} {bitrate}: {totals[fmt] / 1e6:.2f}MB ({totals[fmt] / totals['wav'] * 100:.1f}%), "
+              f"평균 인코딩 {times[fmt] / len(files) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""TTS 처리량 벤치마크 (동시 요청 수 sweep)
+
+실행 중인 TTS 서버에 동시 요청 수를 바꿔 가며 /tts 를 보내고 처리량(요청/s, 합성된 음성 초/s)과
+지연 p50/p95 를 잽니다. 캐시를 거치지 않도록 X-TTS-No-Cache: 1 로 보냅니다.
+레플리카 수(TTS_REPLICAS)를 바꿔 서버를 띄운 뒤 같은 명령으로 비교합니다.
+
+사용법:
+    python bench_pool.py --url http://localhost:9200 --concurrency 1,2,4,8 --requests 32
+    TTS_REPLICAS=cuda:0,cuda:0 uvicorn tts1:app --port 9200   # 레플리카 2개로 다시 측정
+"""
+import argparse
+import io
+import statistics
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 키오스크 응답 길이 분포 (짧은 안내 / 트리아지 / 길안내)
+TEXTS = [
+    "전화번호를 말씀해주세요.",
+    "주소가 맞습니까?",
+    "말씀하신 증상에는 신경과가 적절합니다. 이 진료과로 접수해 드릴까요?",
+    "정형외과는 본관 2층에 있습니다. 엘리베이터를 타고 2층에서 내려 오른쪽으로 가시면 됩니다.",
+]
+
+
+def audio_seconds(data: bytes) -> float:
+    with wave.open(io.BytesIO(data), "rb") as w:
+        return w.getnframes() / w.getframerate()
+
+
+def call(url, text):
+    start = time.perf_counter()
+    r = requests.post(f"{url}/tts", json={"text": text, "speed": 1.0}, headers={"X-TTS-No-Cache": "1"}, timeout=120)
+    r.raise_for_status()
+    return time.perf_counter() - start, audio_seconds(r.content)
+
+
+def sweep(url, concurrency, total):
+    texts = [TEXTS[i % len(TEXTS)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda t: call(url, t), texts))
+    wall = time.perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    audio = sum(r[1] for r in results)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{concurrency:>5} {total / wall:8.2f} {audio / wall:9.2f} "
+          f"{statistics.median(latencies) * 1000:8.0f} {p95 * 1000:8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:9200")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--requests", type=int, default=32)
+    args = parser.parse_args()
+
+    stats = requests.get(f"{args.url}/stats", timeout=5).json()
+    pool = stats.get("pool")
+    print(f"레플리카: {len(pool['replicas']) if pool else 1}개")
+    call(args.url, TEXTS[0])  # 워밍업
+
+    print(f"{'conc':>5} {'req/s':>8} {'audio x':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        sweep(args.url, concurrency, args.requests)
+
+    if pool:
+        replicas = requests.get(f"{args.url}/stats", timeout=5).json()["pool"]["replicas"]
+        print("레플리카별 처리 수: " + ", ".join(f"{r['device']}={r['done']}" for r in replicas))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# 형식 → (Content-Type, 파일 확장자)
+FORMATS = {
+    "wav": ("audio/wav", "wav"),
+    "opus": ("audio/ogg", "opus"),  # Ogg 컨테이너의 Opus (브라우저 <audio> 에서 바로 재생)
+    "mp3": ("audio/mpeg", "mp3"),
+}
+EXTENSIONS = {ext: fmt for fmt, (_, ext) in FORMATS.items()}
+
+# Accept 헤더의 미디어 타입 → 형식
+ACCEPT_TYPES = {
+    "audio/wav": "wav", "audio/x-wav": "wav", "audio/wave": "wav",
+    "audio/ogg": "opus", "audio/opus": "opus",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+}
+
+
+def negotiate(requested=None, accept=None, default="wav"):
+    """명시한 format 파라미터가 우선이고, 없으면 Accept 헤더에서 q 값이 가장 높은 지원 형식을 고릅니다."""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in FORMATS else None
+
+    best, best_q = default, 0.0
+    for item in (accept or "").split(","):
+        media, _, params = item.strip().partition(";")
+        fmt = ACCEPT_TYPES.get(media.strip().lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def encode(wav: bytes, fmt: str, bitrate: str) -> bytes:
+    """WAV 바이트를 ffmpeg 로 opus / mp3 로 인코딩합니다 (파이프로 주고받아 파일을 쓰지 않음)."""
+    if fmt == "wav":
+        return wav
+    if fmt == "opus":
+        # 음성용 설정, Opus 는 48kHz 로 리샘플
+        codec = ["-c:a", "libopus", "-application", "voip", "-ar", "48000", "-f", "ogg"]
+    else:
+        codec = ["-c:a", "libmp3lame", "-f", "mp3"]
+    p = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0", "-ac", "1", *codec, "-b:a", bitrate, "pipe:1"],
+        input=wav, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if p.returncode != 0:
+        raise RuntimeError(f"ffmpeg 인코딩 실패({fmt}): {p.stderr.decode(errors='ignore').strip()}")
+    return p.stdout
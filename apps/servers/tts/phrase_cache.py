@@ -0,0 +1,180 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# 디스크에 두는 형식 (WAV 원본과 그 인코딩본)
+EXTENSIONS = ("wav", "opus", "mp3")
+# 이보다 오래된 임시 파일은 쓰다가 죽은 프로세스가 남긴 것으로 보고 기동 시 지움
+# (같은 디렉터리를 쓰는 다른 프로세스가 쓰는 중인 파일은 건드리지 않도록 여유를 둠)
+STALE_TMP_S = 300.0
+
+
+def phrase_key(text: str, speaker: str, speed: float, model_id: str) -> str:
+    """텍스트 / 화자 / 속도 / 모델 식별자로 합성 결과의 캐시 키를 만듭니다."""
+    h = hashlib.sha256()
+    for part in (model_id, speaker, f"{float(speed):.2f}", text.strip()):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_phrases(path: str):
+    """한 줄에 한 문장 (# 주석과 빈 줄 제외)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class PhraseCache:
+    """합성된 음성 캐시 (디스크 LRU + 메모리 hot tier).
+
+    - 디스크: directory/<key>.wav (인코딩본은 같은 키의 <key>.opus / <key>.mp3),
+      전체 크기가 max_bytes 를 넘으면 가장 오래 안 쓴 파일부터 삭제.
+      재시작해도 유지되므로 고정 문구는 처음 한 번만 합성합니다.
+    - 메모리: 최근에 쓴 바이트를 memory_bytes 까지 보관 (디스크 읽기도 생략).
+    - put(disk=False) 인 항목(한 번 쓰고 말 LLM 응답 등)은 메모리에만 둡니다.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, memory_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.memory_bytes = int(memory_bytes)
+        self._disk = OrderedDict()    # 파일 이름 → 크기 (LRU 순서)
+        self._memory = OrderedDict()  # 파일 이름 → 바이트
+        self.disk_total = 0
+        self.memory_total = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # 기존 파일은 마지막 접근 시각 순으로 LRU 에 올리고, 남은 임시 파일(*.tmp)은 지움
+        entries = []
+        now = time.time()
+        for name in os.listdir(directory):
+            ext = name.rpartition(".")[2]
+            if ext not in EXTENSIONS and ext != "tmp":
+                continue
+            try:
+                st = os.stat(os.path.join(directory, name))
+                if ext == "tmp":
+                    if now - st.st_mtime > STALE_TMP_S:
+                        os.remove(os.path.join(directory, name))
+                    continue
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self.disk_total += size
+        with self._lock:
+            self._evict_disk()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __contains__(self, key):
+        name = f"{key}.wav"
+        with self._lock:
+            return name in self._memory or name in self._disk
+
+    def get(self, key, ext="wav"):
+        """바이트 또는 None"""
+        key = f"{key}.{ext}"
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.memory_hits += 1
+                return data
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # 밖에서 지워진 파일
+            with self._lock:
+                self.disk_total -= self._disk.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data: bytes, ext="wav", disk=None):
+        """disk 가 None 이면 같은 키의 WAV 가 디스크에 있을 때만 디스크에 씁니다 (인코딩본용)."""
+        if disk is None:
+            with self._lock:
+                disk = f"{key}.wav" in self._disk
+        key = f"{key}.{ext}"
+        if self.max_bytes <= 0 and self.memory_bytes <= 0:
+            return
+        if disk and self.max_bytes > 0 and len(data) <= self.max_bytes:
+            # 임시 파일에 쓴 뒤 rename 해서 읽는 쪽이 반쯤 쓴 파일을 보지 않게 함
+            tmp = f"{self.path(key)}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, self.path(key))
+            except OSError:
+                # 디스크가 꽉 찬 경우 등: 임시 파일을 남기지 않고 예외는 그대로 올림
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+            with self._lock:
+                self.disk_total += len(data) - self._disk.pop(key, 0)
+                self._disk[key] = len(data)
+                self._evict_disk()
+        with self._lock:
+            self._remember(key, data)
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        self.memory_total += len(data) - len(self._memory.pop(key, b""))
+        self._memory[key] = data
+        while self.memory_total > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self.memory_total -= len(old)
+
+    def _evict_disk(self):
+        while self.disk_total > self.max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self.disk_total -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "directory": self.directory,
+                "disk_entries": len(self._disk),
+                "disk_mb": round(self.disk_total / 1e6, 1),
+                "max_mb": round(self.max_bytes / 1e6, 1),
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self.memory_total / 1e6, 1),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
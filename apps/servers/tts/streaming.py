@@ -0,0 +1,62 @@
+import io
+import re
+import struct
+import wave
+
+import numpy as np
+
+# llm/streaming.py 와 같은 문장 경계: 문장부호 뒤 공백, 또는 줄바꿈
+SENTENCE_END = re.compile(r"[.!?…。]+[\"'”’)\]]*(?=\s)|\n+")
+# 이보다 짧은 조각("네." 등)은 다음 문장과 합쳐 한 번에 합성 (너무 짧으면 억양이 어색함)
+MIN_SENTENCE_CHARS = 4
+
+
+def split_sentences(text: str, min_chars=MIN_SENTENCE_CHARS):
+    """텍스트를 한국어 문장 단위로 자릅니다."""
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+
+    merged, carry = [], ""
+    for sentence in filter(None, sentences):
+        carry = f"{carry} {sentence}".strip()
+        if len(carry) >= min_chars:
+            merged.append(carry)
+            carry = ""
+    if carry:
+        if merged:
+            merged[-1] = f"{merged[-1]} {carry}"
+        else:
+            merged.append(carry)
+    return merged
+
+
+def to_pcm16(audio) -> bytes:
+    """[-1, 1] float 파형 → PCM16LE 바이트"""
+    audio = np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0)
+    return (audio * 32767.0).astype("<i2").tobytes()
+
+
+def wav_bytes(pcm: bytes, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+def pcm_from_wav(data: bytes):
+    """(PCM 바이트, 샘플레이트)"""
+    with wave.open(io.BytesIO(data), "rb") as w:
+        return w.readframes(w.getnframes()), w.getframerate()
+
+
+def stream_header(sample_rate: int) -> bytes:
+    """길이를 모르는 16bit 모노 WAV 헤더 (RIFF / data 크기를 0xFFFFFFFF 로 둠, 브라우저는 끝까지 재생)"""
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
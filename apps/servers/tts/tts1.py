@@ -1,11 +1,27 @@
+import asyncio
 import os
+import sys
+import threading
+import time
 import uuid
 import logging
+from collections import Counter
+from typing import Optional
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.concurrency import run_in_threadpool
 from melo.api import TTS
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.health import Health
+from common.janitor import Janitor
+from common.startup import Startup
+from audio_store import AudioStore
+from encode import EXTENSIONS, FORMATS, encode, negotiate
+from phrase_cache import PhraseCache, load_phrases, phrase_key
+from streaming import pcm_from_wav, split_sentences, stream_header, to_pcm16, wav_bytes
+from worker_pool import TTSWorkerPool, parse_replicas
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -16,25 +32,182 @@ logger = logging.getLogger(__name__)
 app = FastAPI()
 
 # main.py와 공유되는 출력 디렉토리 경로
+# 합성 결과는 메모리 버퍼로 바로 응답하므로 여기에는 더 이상 쓰지 않고, 남은 파일은 janitor 가 정리합니다.
 OUTPUT_DIR = "/tmp/melotts_output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+janitor = Janitor(
+    OUTPUT_DIR,
+    ttl_s=float(os.getenv("TTS_OUTPUT_TTL_S", "3600")),
+    max_bytes=float(os.getenv("TTS_OUTPUT_MAX_MB", "256")) * 1024 * 1024,
+    interval_s=float(os.getenv("TTS_JANITOR_INTERVAL_S", "60")),
+)
 
-# 모델 로드
-model = TTS(language='KR', device='cuda:0')
-speaker_ids = model.hps.data.spk2id
+# /tts 결과를 /audio/{filename} 으로 다시 받을 수 있도록 잠시 메모리에 보관
+recent_audio = AudioStore(
+    ttl_s=float(os.getenv("TTS_RECENT_TTL_S", "600")),
+    max_bytes=float(os.getenv("TTS_RECENT_MB", "64")) * 1024 * 1024,
+)
 
-# 헬스 체크
-@app.get("/health")
-def health():
+# 모델 로드 (서버가 뜬 뒤 백그라운드에서 진행, /live 는 바로 응답하고 /ready 는 워밍업까지 끝난 뒤 200)
+TTS_DEVICE = os.getenv("TTS_DEVICE", "cuda:0")
+model = speaker_ids = sample_rate = None
+# 풀 없이 모델 하나를 쓸 때는 합성을 한 번에 하나씩 (health 점검도 같은 잠금을 씀)
+# model_waiting 은 합성 중이거나 기다리는 요청 수 (/health 의 queue_depth)
+model_lock = threading.Lock()
+model_waiting = 0
+waiting_lock = threading.Lock()
+startup = Startup("tts")
+
+# 레플리카 풀: TTS_REPLICAS="cuda:0,cuda:1" 또는 "cpu@0-3,cpu@4-7" 이면 레플리카마다 별도 프로세스에 모델을 올림
+# (비어 있으면 이 프로세스에 TTS_DEVICE 모델 하나)
+TTS_REPLICAS = parse_replicas(os.getenv("TTS_REPLICAS", ""))
+POOL_TIMEOUT_S = float(os.getenv("TTS_POOL_TIMEOUT_S", "60"))
+pool = TTSWorkerPool(
+    TTS_REPLICAS,
+    max_restarts=int(os.getenv("TTS_POOL_MAX_RESTARTS", "3")),
+) if TTS_REPLICAS else None
+
+def load_models():
+    global model, speaker_ids, sample_rate
+    if pool is not None:
+        # 레플리카는 각자 로딩 후 워밍업까지 마치고 준비 신호를 보냄
+        with startup.phase("load_replicas"):
+            pool.start()
+            sample_rate = pool.sample_rate
+    else:
+        with startup.phase("load_model"):
+            model = TTS(language='KR', device=TTS_DEVICE)
+            speaker_ids = model.hps.data.spk2id
+            sample_rate = model.hps.data.sampling_rate
+        # 첫 요청이 BERT/g2p 초기화와 CUDA 커널 선택 비용을 치르지 않도록 짧은 문장을 한 번 합성
+        with startup.phase("warmup"):
+            model.tts_to_file("테스트", speaker_ids[SPEAKER], None, speed=1.0)
+    # 고정 문구를 미리 합성 (디스크 캐시에 이미 있으면 건너뜀)
+    if PRESYNTH:
+        with startup.phase("presynth"):
+            presynthesize(load_phrases(PRESYNTH_PATH))
+
+# 합성 결과 캐시: (텍스트, 화자, 속도) → WAV. 디스크 LRU + 메모리 hot tier
+SPEAKER = "KR"
+MODEL_ID = "melotts|KR"
+phrase_cache = PhraseCache(
+    os.getenv("TTS_CACHE_DIR", "/tmp/melotts_cache"),
+    max_bytes=float(os.getenv("TTS_CACHE_MB", "512")) * 1024 * 1024,
+    memory_bytes=float(os.getenv("TTS_CACHE_MEM_MB", "64")) * 1024 * 1024,
+)
+PRESYNTH = os.getenv("TTS_PRESYNTH", "1") == "1"
+PRESYNTH_PATH = os.getenv("TTS_PRESYNTH_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixed_phrases.txt"))
+# 디스크 캐시에는 고정 문구와 짧은 문장(TTS_CACHE_DISK_CHARS 자 이하)만 남기고,
+# 한 번 쓰고 말 LLM 응답은 메모리 tier 에만 둠 (요청마다 디스크 쓰기 없음)
+FIXED_PHRASES = set(load_phrases(PRESYNTH_PATH))
+CACHE_DISK_CHARS = int(os.getenv("TTS_CACHE_DISK_CHARS", "20"))
+
+def persist_on_disk(text):
+    return text in FIXED_PHRASES or len(text) <= CACHE_DISK_CHARS
+
+def run_model(text, speed):
+    global model_waiting
+    with waiting_lock:
+        model_waiting += 1
     try:
-        test_path = os.path.join(OUTPUT_DIR, "test.wav")
-        model.tts_to_file("테스트", speaker_ids["KR"], test_path, speed=1.0)
-        if os.path.exists(test_path):
-            os.remove(test_path)
-        return JSONResponse({"status": "ok"})
-    except Exception as e:
-        logger.exception("[x] TTS health check failed")
-        return JSONResponse({"status": "error", "detail": str(e)}, status_code=503)
+        with model_lock:
+            return model.tts_to_file(text, speaker_ids[SPEAKER], None, speed=speed)
+    finally:
+        with waiting_lock:
+            model_waiting -= 1
+
+def synthesize(text, speed):
+    """WAV 바이트를 합성하고 캐시에 넣습니다.
+
+    output_path 없이 호출하면 MeloTTS 가 파일을 쓰지 않고 파형(float)을 돌려주므로
+    모델 → 메모리 버퍼 → HTTP 응답까지 디스크를 거치지 않습니다.
+    """
+    if pool is not None:
+        data = pool.submit(text, speed).result(timeout=POOL_TIMEOUT_S)
+    else:
+        data = wav_bytes(to_pcm16(run_model(text, speed)), sample_rate)
+    phrase_cache.put(phrase_key(text, SPEAKER, speed, MODEL_ID), data, disk=persist_on_disk(text))
+    return data
+
+def synthesize_sentence(text, speed):
+    """한 문장을 PCM16 바이트로 합성합니다 (문장 단위로 캐시 사용)."""
+    cached = phrase_cache.get(phrase_key(text, SPEAKER, speed, MODEL_ID))
+    return pcm_from_wav(cached if cached is not None else synthesize(text, speed))[0]
+
+# 압축 전송: opus(Ogg) / mp3. 인코딩본은 WAV 와 같은 키로 캐시해 발화당 한 번만 인코딩
+BITRATES = {"opus": os.getenv("TTS_OPUS_BITRATE", "24k"), "mp3": os.getenv("TTS_MP3_BITRATE", "48k")}
+encode_stats = Counter()
+
+def encode_audio(wav, fmt, key=None):
+    """(바이트, 실제 형식). 인코딩에 실패하면 (ffmpeg 없음 등) WAV 그대로 보냅니다."""
+    if fmt == "wav":
+        return wav, fmt
+    ext = FORMATS[fmt][1]
+    data = phrase_cache.get(key, ext) if key else None
+    if data is not None:
+        return data, fmt
+    try:
+        data = encode(wav, fmt, BITRATES[fmt])
+    except Exception:
+        logger.exception(f"[x] {fmt} 인코딩 실패, WAV 로 전송")
+        encode_stats["failed"] += 1
+        return wav, "wav"
+    encode_stats[fmt] += 1
+    encode_stats["wav_bytes"] += len(wav)
+    encode_stats[f"{fmt}_bytes"] += len(data)
+    if key:
+        phrase_cache.put(key, data, ext)
+    return data, fmt
+
+def presynthesize(phrases):
+    done = 0
+    for text in phrases:
+        if phrase_key(text, SPEAKER, 1.0, MODEL_ID) in phrase_cache:
+            continue
+        try:
+            synthesize(text, 1.0)
+            done += 1
+        except Exception:
+            logger.exception(f"[x] 고정 문구 합성 실패: {text}")
+    logger.info(f"[o] 고정 문구 {len(phrases)}개 준비 (새로 합성 {done}개)")
+
+startup.install(app, load_models)
+
+@app.on_event("startup")
+def start_janitor():
+    janitor.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    janitor.stop()
+    if pool is not None:
+        pool.stop()
+
+# 헬스 체크
+# /health 는 합성 없이 캐시된 상태만 응답. 실제 합성 점검은 TTS_HEALTH_PROBE_S 마다 백그라운드에서 (0 이면 끔)
+# 점검 결과는 캐시에 넣지 않음
+def health_probe():
+    if pool is not None:
+        pool.submit("테스트", 1.0).result(timeout=POOL_TIMEOUT_S)
+    else:
+        with model_lock:
+            model.tts_to_file("테스트", speaker_ids[SPEAKER], None, speed=1.0)
+
+def pool_health():
+    if pool is None:
+        return {}
+    replicas = pool.stats()["replicas"]
+    return {"replicas": len(replicas), "replicas_alive": sum(r["alive"] for r in replicas)}
+
+health = Health(
+    startup,
+    probe=health_probe,
+    interval_s=float(os.getenv("TTS_HEALTH_PROBE_S", "60")),
+    queue_depth=lambda: pool.queue_depth if pool is not None else model_waiting,
+    device=lambda: TTS_DEVICE if pool is None else None,
+    extra=pool_health,
+)
+health.install(app)
 
 # 텍스트 → 음성 변환
 from fastapi.responses import FileResponse
@@ -50,26 +223,105 @@ async def generate(request: Request):
         if not text:
             return JSONResponse({"error": "text is missing or empty"}, status_code=400)
 
+        # 응답 형식: body 의 format ("wav" | "opus" | "mp3") 또는 Accept 헤더 (기본 wav)
+        fmt = negotiate(data.get("format"), request.headers.get("accept"))
+        if fmt is None:
+            return JSONResponse({"error": f"unsupported format: {data.get('format')}"}, status_code=400)
+
         uid = str(uuid.uuid4())
-        output_path = os.path.join(OUTPUT_DIR, f"{uid}.wav")
 
-        logger.info(f"TTS 생성 요청 - 텍스트: '{text}' → 파일: {output_path}")
-        await run_in_threadpool(model.tts_to_file, text, speaker_ids["KR"], output_path, speed)
+        # 같은 문장(고정 안내 문구 등)은 합성 없이 캐시에서 바로 반환 (X-TTS-No-Cache: 1 이면 항상 합성, 벤치마크용)
+        key = phrase_key(text, SPEAKER, speed, MODEL_ID)
+        no_cache = request.headers.get("x-tts-no-cache", "").lower() in ("1", "true")
+        wav = None if no_cache else phrase_cache.get(key)
+        cache_status = "hit" if wav is not None else "miss"
+        if wav is None:
+            logger.info(f"TTS 생성 요청 - 텍스트: '{text}' → {uid}.{FORMATS[fmt][1]}")
+            wav = await run_in_threadpool(synthesize, text, speed)
+        else:
+            logger.info(f"TTS 캐시 hit - 텍스트: '{text}'")
+        recent_audio.put(f"{uid}.wav", wav)
 
-        # 여기서 바로 음성파일 반환
-        return FileResponse(
-            output_path,
-            media_type="audio/wav",
-            filename=f"{uid}.wav"
-        )
+        audio, fmt = (wav, fmt) if fmt == "wav" else await run_in_threadpool(encode_audio, wav, fmt, key)
+        filename = f"{uid}.{FORMATS[fmt][1]}"
+        if fmt != "wav":
+            recent_audio.put(filename, audio)
+
+        # 여기서 바로 음성 반환 (파일을 쓰지 않음)
+        return Response(audio, media_type=FORMATS[fmt][0], headers={
+            "Content-Disposition": f'attachment; filename="{filename}"', "X-TTS-Cache": cache_status,
+            "X-TTS-Format": fmt, "Vary": "Accept"})
 
     except Exception as e:
         logger.exception("[x] TTS 생성 중 오류")
         return JSONResponse({"error": "TTS generation failed", "detail": str(e)}, status_code=500)
 
+# 스트리밍 TTS: 문장 단위로 합성해 길이 미정 WAV 헤더 + PCM 조각을 chunked 로 전송
+# 첫 문장이 합성되면 바로 재생이 시작되고, 다음 문장은 앞 문장을 보내는 동안 미리 합성합니다.
+@app.post("/tts/stream")
+async def generate_stream(request: Request):
+    data = await request.json()
+    text = data.get("text", "").strip()
+    speed = max(0.5, min(float(data.get("speed", 1.0)), 2.0))
+
+    if not text:
+        return JSONResponse({"error": "text is missing or empty"}, status_code=400)
+
+    sentences = split_sentences(text)
+    logger.info(f"TTS 스트리밍 요청 - {len(sentences)}문장: '{text}'")
+
+    # 고정 안내 문구처럼 전체 문장이 통째로 캐시되어 있으면 (미리 합성 / 이전 /tts 결과) 그대로 흘려보냄
+    cached = phrase_cache.get(phrase_key(text, SPEAKER, speed, MODEL_ID))
+    if cached is not None:
+        async def cached_stream():
+            yield stream_header(sample_rate)
+            yield pcm_from_wav(cached)[0]
+
+        return StreamingResponse(cached_stream(), media_type="audio/wav",
+                                 headers={"X-TTS-Sentences": str(len(sentences)), "X-TTS-Sample-Rate": str(sample_rate),
+                                          "X-TTS-Cache": "hit"})
+
+    async def audio_stream():
+        start = time.perf_counter()
+        yield stream_header(sample_rate)
+        task = asyncio.ensure_future(run_in_threadpool(synthesize_sentence, sentences[0], speed))
+        try:
+            for i in range(len(sentences)):
+                pcm = await task
+                if i + 1 < len(sentences):
+                    task = asyncio.ensure_future(run_in_threadpool(synthesize_sentence, sentences[i + 1], speed))
+                if i == 0:
+                    logger.info(f"TTS 스트리밍 첫 오디오: {(time.perf_counter() - start) * 1000:.0f}ms")
+                yield pcm
+        except Exception:
+            logger.exception("[x] TTS 스트리밍 합성 중 오류")
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(audio_stream(), media_type="audio/wav",
+                             headers={"X-TTS-Sentences": str(len(sentences)), "X-TTS-Sample-Rate": str(sample_rate)})
+
 # 음성 파일 제공
+# ?format=opus|mp3|wav 또는 Accept 헤더로 형식 지정 (없으면 파일 이름의 확장자)
 @app.get("/audio/{filename}")
-async def get_audio(filename: str):
+async def get_audio(filename: str, request: Request, format: Optional[str] = None):
+    stem, _, ext = filename.rpartition(".")
+    fmt = negotiate(format, request.headers.get("accept"), default=EXTENSIONS.get(ext, "wav"))
+    if fmt is None:
+        return JSONResponse({"error": f"unsupported format: {format}"}, status_code=400)
+
+    name = f"{stem}.{FORMATS[fmt][1]}"
+    audio = recent_audio.get(name)
+    if audio is None and fmt != "wav":
+        wav = recent_audio.get(f"{stem}.wav")
+        if wav is not None:
+            audio, fmt = await run_in_threadpool(encode_audio, wav, fmt)
+            recent_audio.put(f"{stem}.{FORMATS[fmt][1]}", audio)
+    if audio is not None:
+        return Response(audio, media_type=FORMATS[fmt][0], headers={"X-TTS-Format": fmt, "Vary": "Accept"})
+
+    # 이전 버전이 디스크에 남긴 파일
     path = os.path.join(OUTPUT_DIR, filename)
 
     if not os.path.exists(path):
@@ -78,3 +330,13 @@ async def get_audio(filename: str):
 
     logger.info(f"WAV 파일 전송: {filename}")
     return FileResponse(path, media_type="audio/wav")
+
+@app.get("/stats")
+def stats():
+    return JSONResponse({
+        "cache": phrase_cache.stats(),
+        "recent_audio": recent_audio.stats(),
+        "janitor": janitor.stats(),
+        "pool": pool.stats() if pool is not None else None,
+        "encode": dict(encode_stats),
+    })
@@ -0,0 +1,293 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from streaming import to_pcm16, wav_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def parse_replicas(spec: str):
+    """"cuda:0,cuda:1,cpu@0-3,cpu@4-7" → [(device, [cores] 또는 None), ...]"""
+    replicas = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        device, _, cores = item.partition("@")
+        core_list = None
+        if cores:
+            core_list = []
+            for part in cores.split("+"):
+                lo, _, hi = part.partition("-")
+                core_list += list(range(int(lo), int(hi or lo) + 1))
+        replicas.append((device, core_list))
+    return replicas
+
+
+def replica_main(index, device, cores, language, speaker, jobs, results):
+    """레플리카 프로세스: 모델을 하나 올리고 jobs 에서 받은 작업을 차례로 합성합니다.
+
+    결과는 레플리카 전용 파이프(results)로 보냅니다. 여러 레플리카가 한 Queue 에 쓰면
+    한 레플리카가 쓰는 도중 죽었을 때 공유 쓰기 잠금이 풀리지 않아 나머지도 멈추기 때문입니다.
+    """
+    try:
+        if cores:
+            os.sched_setaffinity(0, cores)
+            import torch
+            torch.set_num_threads(len(cores))
+        from melo.api import TTS
+
+        model = TTS(language=language, device=device)
+        speaker_id = model.hps.data.spk2id[speaker]
+        sample_rate = model.hps.data.sampling_rate
+        model.tts_to_file("테스트", speaker_id, None, speed=1.0)
+    except Exception as e:
+        results.send(("failed", index, f"{type(e).__name__}: {e}"))
+        return
+    results.send(("ready", index, sample_rate))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, text, speed = job
+        try:
+            audio = model.tts_to_file(text, speaker_id, None, speed=speed)
+            results.send((job_id, wav_bytes(to_pcm16(audio), sample_rate), None))
+        except Exception as e:
+            results.send((job_id, None, f"{type(e).__name__}: {e}"))
+
+
+class Replica:
+    def __init__(self, index, device, cores):
+        self.index = index
+        self.device = device
+        self.cores = cores
+        self.process = None
+        self.jobs = None
+        self.conn = None  # 결과를 받는 파이프 (부모 쪽)
+        self.ready = False
+        self.in_flight = 0
+        self.done = 0
+        self.restarts = 0
+        self.retired = False  # 재시작 한도를 넘겨 더는 쓰지 않음
+
+
+class TTSWorkerPool:
+    """MeloTTS 레플리카 N개를 별도 프로세스로 띄우고 요청을 나눠 주는 디스패처.
+
+    - 레플리카마다 장치(cuda:N) 또는 CPU 코어(cpu@0-3)를 고정합니다.
+    - 작업은 하나씩, 처리 중인 작업이 가장 적은 준비된 레플리카로 보냅니다.
+      (MeloTTS 는 문장 하나씩 추론하므로 여러 문장을 한 레플리카에 묶어 보내면 지연만 늘어남)
+    - 레플리카 프로세스가 죽으면 맡고 있던 작업을 실패 처리하고 다시 띄웁니다
+      (max_restarts 번을 넘기면 그 레플리카는 뺌).
+    """
+
+    def __init__(self, replicas, language="KR", speaker="KR", max_restarts=3):
+        self.replicas = [Replica(i, device, cores) for i, (device, cores) in enumerate(replicas)]
+        self.language = language
+        self.speaker = speaker
+        self.max_restarts = int(max_restarts)
+        self.sample_rate = None
+
+        self._ctx = multiprocessing.get_context("spawn")  # 자식이 CUDA 를 새로 초기화하도록 spawn
+        self._pending = queue.Queue()
+        self._futures = {}
+        self._owner = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._started = False
+        self._stopped = False
+        self.failed = 0
+        self.lost_jobs = 0
+
+    def start(self, timeout_s=600.0):
+        """레플리카를 모두 띄우고 모델 로딩/워밍업이 끝날 때까지 기다립니다."""
+        for r in self.replicas:
+            self._spawn(r)
+        threading.Thread(target=self._collect_results, name="tts-pool-results", daemon=True).start()
+
+        deadline = time.monotonic() + timeout_s
+        with self._ready:
+            while not all(r.ready for r in self.replicas):
+                dead = [r.index for r in self.replicas if not r.ready and not r.process.is_alive()]
+                if self.failed or dead:
+                    raise RuntimeError(f"TTS 레플리카 로딩 실패 (실패 {self.failed}개, 종료된 프로세스 {dead})")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("TTS 레플리카 로딩 시간 초과")
+                self._ready.wait(timeout=1.0)
+            self._started = True
+        threading.Thread(target=self._dispatch, name="tts-pool-dispatch", daemon=True).start()
+        logger.info(f"[o] TTS 레플리카 {len(self.replicas)}개 준비: "
+                    + ", ".join(f"{r.device}{'@' + str(r.cores) if r.cores else ''}" for r in self.replicas))
+
+    def _spawn(self, r):
+        if r.conn is not None:
+            r.conn.close()
+        r.jobs = self._ctx.Queue()
+        r.conn, child_conn = self._ctx.Pipe(duplex=False)
+        r.ready = False
+        r.process = self._ctx.Process(
+            target=replica_main, name=f"tts-replica-{r.index}", daemon=True,
+            args=(r.index, r.device, r.cores, self.language, self.speaker, r.jobs, child_conn))
+        r.process.start()
+        child_conn.close()
+
+    def _reap(self):
+        """죽은 레플리카가 맡은 작업을 실패 처리하고 레플리카를 다시 띄웁니다.
+
+        결과 수집 스레드에서만 self._lock 안에서 호출합니다 (파이프를 읽는 스레드가 하나여야 함).
+        죽기 직전에 보낸 결과가 파이프에 남아 있을 수 있으므로 먼저 다 읽어 처리한 뒤 남은 작업만 실패 처리합니다.
+        """
+        if self._stopped:
+            return
+        for r in self.replicas:
+            if r.retired or r.process is None or r.process.is_alive():
+                continue
+            if r.conn is not None:
+                try:
+                    while r.conn.poll():
+                        self._handle_locked(r.conn.recv())
+                except (EOFError, OSError):
+                    pass
+            lost = [job_id for job_id, owner in self._owner.items() if owner is r]
+            error = RuntimeError(f"TTS 레플리카 {r.index} 프로세스가 종료되었습니다 (exitcode={r.process.exitcode}).")
+            for job_id in lost:
+                del self._owner[job_id]
+                future = self._futures.pop(job_id, None)
+                if future is not None:
+                    future.set_exception(error)
+            self.lost_jobs += len(lost)
+            r.in_flight = 0
+            if r.restarts >= self.max_restarts:
+                r.retired = True
+                r.ready = False
+                if r.conn is not None:
+                    r.conn.close()
+                    r.conn = None
+                logger.error(f"[x] TTS 레플리카 {r.index} 재시작 한도 초과, 풀에서 제외 (잃은 작업 {len(lost)}개)")
+                continue
+            r.restarts += 1
+            logger.error(f"[x] TTS 레플리카 {r.index} 종료 (잃은 작업 {len(lost)}개), 재시작 {r.restarts}/{self.max_restarts}")
+            self._spawn(r)
+        self._ready.notify_all()
+
+    def submit(self, text: str, speed: float = 1.0) -> Future:
+        """WAV 바이트를 결과로 갖는 Future (스레드 어디서나 호출 가능)"""
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = future
+        self._pending.put((job_id, text, speed))
+        return future
+
+    def _dispatch(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            job_id = job[0]
+            with self._ready:
+                while True:
+                    # 죽은 레플리카 정리/재시작은 결과 수집 스레드가 맡음
+                    ready = [r for r in self.replicas if r.ready and not r.retired and r.process.is_alive()]
+                    if ready or self._stopped or all(r.retired for r in self.replicas):
+                        break
+                    # 재시작 중인 레플리카가 준비될 때까지 기다림
+                    self._ready.wait(timeout=1.0)
+                if not ready:
+                    future = self._futures.pop(job_id, None)
+                    if future is not None:
+                        future.set_exception(RuntimeError("살아 있는 TTS 레플리카가 없습니다."))
+                    continue
+                replica = min(ready, key=lambda r: r.in_flight)
+                replica.in_flight += 1
+                self._owner[job_id] = replica
+            replica.jobs.put(job)
+
+    def _collect_results(self):
+        while not self._stopped:
+            with self._lock:
+                if self._started:
+                    self._reap()
+                conns = {r.conn: r for r in self.replicas if r.conn is not None}
+            if not conns:
+                time.sleep(1.0)
+                continue
+            for conn in wait(list(conns), timeout=1.0):
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    # 프로세스가 종료됨 → 맡은 작업은 다음 _reap 에서 정리
+                    with self._lock:
+                        if conns[conn].conn is conn:
+                            conns[conn].conn = None
+                    conn.close()
+                    continue
+                self._handle(message)
+
+    def _handle(self, message):
+        with self._lock:
+            self._handle_locked(message)
+
+    def _handle_locked(self, message):
+        key, payload, extra = message
+        if key == "ready":
+            self.replicas[payload].ready = True
+            self.sample_rate = extra
+            self._ready.notify_all()
+            return
+        if key == "failed":
+            self.failed += 1
+            logger.error(f"[x] TTS 레플리카 {payload} 로딩 실패: {extra}")
+            if self._started:
+                # 재시작한 레플리카가 로딩에 실패하면 그 레플리카는 뺌
+                self.replicas[payload].retired = True
+            self._ready.notify_all()
+            return
+        future = self._futures.pop(key, None)
+        replica = self._owner.pop(key, None)
+        if replica is not None and replica.in_flight > 0:
+            replica.in_flight -= 1
+            replica.done += 1
+        if future is None:
+            return
+        if extra is not None:
+            future.set_exception(RuntimeError(extra))
+        else:
+            future.set_result(payload)
+
+    @property
+    def queue_depth(self):
+        return self._pending.qsize()
+
+    def stop(self):
+        self._stopped = True
+        self._pending.put(None)
+        with self._ready:
+            self._ready.notify_all()
+        for r in self.replicas:
+            if r.jobs is not None and r.process.is_alive():
+                r.jobs.put(None)
+        for r in self.replicas:
+            if r.process is not None:
+                r.process.join(timeout=5)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replicas": [
+                    {"device": r.device, "cores": r.cores, "ready": r.ready,
+                     "alive": r.process is not None and r.process.is_alive(),
+                     "in_flight": r.in_flight, "done": r.done,
+                     "restarts": r.restarts, "retired": r.retired}
+                    for r in self.replicas
+                ],
+                "queue_depth": self._pending.qsize(),
+                "lost_jobs": self.lost_jobs,
+            }